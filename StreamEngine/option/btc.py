@@ -77,5 +77,4 @@ class btc(frametest.testerOption):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
\ No newline at end of file
@@ -154,7 +154,6 @@ class binance_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
 
@@ -263,7 +262,6 @@ class okx_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
 
@@ -380,7 +378,6 @@ class bybit_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
 
@@ -390,7 +387,7 @@ class bingx_flow(tester):
         self.level_size = level_size
         self.spot_axis = {
             "books" : {
-                "btcusdt" : flow.booksflow('bingx', 'btc_usdt', 'perpetual', level_size, lookups_btc.bingx_depth_lookup, book_ceil_thresh),
+                "btcusdt" : flow.coalescedbooksflow('bingx', 'btc_usdt', 'perpetual', level_size, lookups_btc.bingx_depth_lookup, book_ceil_thresh),
             },
             "trades": {
                 "btcusdt" : flow.tradesflow('bingx', 'btc_usdt', 'perpetual', level_size, lookups_btc.bingx_trades_lookup),
@@ -458,7 +455,6 @@ class bingx_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
 
@@ -512,7 +508,6 @@ class coinbase_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
 
@@ -576,7 +571,6 @@ class deribit_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
 
@@ -588,7 +582,7 @@ class gateio_flow(tester):
         self.level_size = level_size
         self.spot_axis = {
             "books" : {
-                "btcusdt" : flow.booksflow('gateio', 'btc_usdt', 'spot', level_size, lookups_btc.gateio_depth_lookup, book_ceil_thresh),
+                "btcusdt" : flow.coalescedbooksflow('gateio', 'btc_usdt', 'spot', level_size, lookups_btc.gateio_depth_lookup, book_ceil_thresh),
             },
             "trades": {
                 "btcusdt" : flow.tradesflow('gateio', 'btc_usdt', 'spot', level_size, lookups_btc.gateio_trades_lookup),
@@ -665,7 +659,6 @@ class gateio_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
 
@@ -742,7 +735,6 @@ class bitget_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
 
@@ -762,7 +754,7 @@ class kucoin_flow(tester):
         }
         self.perpetual_axis= {
             "books" : {
-                "btcusdt" : flow.booksflow('bitget', 'btc_usdt', 'perpetual', level_size, lookups_btc.kucoin_depth_lookup, book_ceil_thresh),
+                "btcusdt" : flow.coalescedbooksflow('bitget', 'btc_usdt', 'perpetual', level_size, lookups_btc.kucoin_depth_lookup, book_ceil_thresh),
             },
             "trades": {
                 "btcusdt" : flow.tradesflow('bitget', 'btc_usdt', 'perpetual', level_size, lookups_btc.kucoin_trades_lookup),
@@ -820,7 +812,6 @@ class kucoin_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
 
@@ -897,7 +888,6 @@ class mexc_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
 
@@ -975,5 +965,4 @@ class htx_flow(tester):
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
\ No newline at end of file
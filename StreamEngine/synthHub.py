@@ -51,6 +51,7 @@ class btcSynth():
                 available : ["bybit", "okx", "deribit"]
             book_ceil_thresh : exclude storing order book data for entries that deviate by a significant percentage from the current market price
             
+            The add_* methods accept messages as json str, bytes or already decoded dictionaries
         """
         self.exchanges_spot_perp = exchanges_spot_perp
         self.exchanges_option = exchanges_option
@@ -516,7 +517,6 @@ class btcSynth():
 
         for key in v.keys():
             for d in v[key]["data"]:
-                d = json.dumps(d)
                 v[key]["lookup"](d)
 
     def test_empty_dataframes(self):
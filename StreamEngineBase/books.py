@@ -0,0 +1,454 @@
+"""
+    Array backed sides of the order book of booksflow
+
+    bookside
+        amounts of one side of the book in a contiguous float64 array indexed by tick - anchor, empty ticks hold 0
+        the anchor is kept at 1 modulo block, so that every block of the array is one level of booksflow (see utilis.flow_level_index)
+        ticks outside of the array re-center it around the book, doubling the capacity when the book does not fit in half of it,
+        so that writes are O(1) amortized
+        the sums and the number of ticks of every level are kept as the amounts are written, a level without ticks sums to exactly 0
+        the best tick (highest for descending sides, the bids) is the top of a heap of the written ticks, deleted ticks
+        are popped when they reach the top and the heap is rebuilt once it holds more stale ticks than live ones
+        load replaces the whole side with a snapshot of the book in one vectorized pass
+
+    heatmap
+        sums of the levels over a window of seconds in a preallocated rows x levels float64 matrix, column j is the level first + j
+        levels outside of the matrix re-center it as bookside does
+        fields are named per second values next to the levels, as the price
+
+    windows
+        two heatmaps that swap roles when the minute closes, current is written while closed keeps the last minute
+
+    windowclock
+        event time of a flow, windows are keyed by their epoch index timestamp // window_ms
+        a window is opened by its first message and closed by the first message of a later window,
+        messages of closed windows are late and windows without messages in between are skipped,
+        gap is the number skipped between the closed window and the current one
+"""
+
+import heapq
+import numpy as np
+
+
+class bookside():
+
+    def __init__(self, block=1, capacity=4096, descending=False):
+        """
+            block : number of ticks of a level
+            capacity : initial number of ticks of the array, rounded up to a multiple of block
+            descending : the best tick is the highest one, as for bids
+        """
+        self.block = block
+        self.sign = -1 if descending else 1
+        self.heap = []
+        self.amounts = np.zeros(-(-max(capacity, 2 * block) // block) * block, dtype=np.float64)
+        self.sums = np.zeros(len(self.amounts) // block, dtype=np.float64)
+        self.counts = np.zeros(len(self.amounts) // block, dtype=np.int64)
+        self.anchor = None
+        self.count = 0
+        # Bounds of the occupied indexes, lo >= hi when the side is empty. They may be loose after deletions
+        self.lo = len(self.amounts)
+        self.hi = 0
+        # Ticks to scan from the best one in top, twice the distance of the last n-th best tick
+        self.top_span = 64
+
+    def __len__(self):
+        return self.count
+
+    def aligned(self, tick):
+        """
+            Highest tick at 1 modulo block that is not above tick
+        """
+        return (tick - 1) // self.block * self.block + 1
+
+    def reserve(self, low, high):
+        """
+            Re-centers the array so that the ticks low to high (inclusive) and the book fit in it
+        """
+        capacity = len(self.amounts)
+        if self.anchor is not None and low >= self.anchor and high < self.anchor + capacity:
+            return
+        occupied = self.lo < self.hi
+        if occupied:
+            low = min(low, self.anchor + self.lo)
+            high = max(high, self.anchor + self.hi - 1)
+        span = high - low + 1
+        while capacity < 2 * (span + self.block):
+            capacity *= 2
+        anchor = self.aligned(low - (capacity - span) // 2)
+        amounts = np.zeros(capacity, dtype=np.float64)
+        sums = np.zeros(capacity // self.block, dtype=np.float64)
+        counts = np.zeros(capacity // self.block, dtype=np.int64)
+        if occupied:
+            # Both anchors are at 1 modulo block, levels move by whole blocks
+            offset = self.anchor - anchor
+            amounts[self.lo + offset:self.hi + offset] = self.amounts[self.lo:self.hi]
+            start, end = self.lo // self.block, -(-self.hi // self.block)
+            sums[start + offset // self.block:end + offset // self.block] = self.sums[start:end]
+            counts[start + offset // self.block:end + offset // self.block] = self.counts[start:end]
+            self.lo, self.hi = self.lo + offset, self.hi + offset
+        else:
+            self.lo, self.hi = capacity, 0
+        self.amounts = amounts
+        self.sums = sums
+        self.counts = counts
+        self.anchor = anchor
+
+    def set(self, tick, amount):
+        """
+            tick : int
+            amount : 0 deletes the tick
+        """
+        if self.anchor is None or not 0 <= tick - self.anchor < len(self.amounts):
+            self.reserve(tick, tick)
+        i = tick - self.anchor
+        level = i // self.block
+        old = self.amounts[i]
+        self.amounts[i] = amount
+        if amount != 0:
+            if old == 0:
+                self.count += 1
+                self.counts[level] += 1
+                heapq.heappush(self.heap, self.sign * tick)
+                if i < self.lo:
+                    self.lo = i
+                if i >= self.hi:
+                    self.hi = i + 1
+            self.sums[level] += amount - old
+        elif old != 0:
+            self.count -= 1
+            self.counts[level] -= 1
+            self.sums[level] = self.sums[level] - old if self.counts[level] != 0 else 0
+
+    def update(self, ticks, amounts):
+        """
+            ticks : int64 array
+            amounts : float64 array, 0 deletes the tick, the last amount of a repeated tick is kept
+        """
+        if len(ticks) == 0:
+            return
+        ticks, last = np.unique(ticks[::-1], return_index=True)
+        amounts = amounts[::-1][last]
+        self.reserve(int(ticks[0]), int(ticks[-1]))
+        indexes = ticks - self.anchor
+        old = self.amounts[indexes]
+        self.amounts[indexes] = amounts
+        self.count += np.count_nonzero(amounts) - np.count_nonzero(old)
+        levels = indexes // self.block
+        np.add.at(self.sums, levels, amounts - old)
+        np.add.at(self.counts, levels, (amounts != 0).astype(np.int64) - (old != 0))
+        emptied = levels[self.counts[levels] == 0]
+        self.sums[emptied] = 0
+        added = (ticks[(amounts != 0) & (old == 0)] * self.sign).tolist()
+        if len(added) > len(self.heap):
+            self.heap.extend(added)
+            heapq.heapify(self.heap)
+        else:
+            for tick in added:
+                heapq.heappush(self.heap, tick)
+        written = indexes[amounts != 0]
+        if len(written) != 0:
+            self.lo = min(self.lo, int(written[0]))
+            self.hi = max(self.hi, int(written[-1]) + 1)
+
+    def clear(self):
+        """
+            Deletes every tick, the array keeps its anchor and capacity
+        """
+        if self.lo < self.hi:
+            start, end = self.lo // self.block, -(-self.hi // self.block)
+            self.amounts[self.lo:self.hi] = 0
+            self.sums[start:end] = 0
+            self.counts[start:end] = 0
+        self.heap = []
+        self.count = 0
+        self.lo, self.hi = len(self.amounts), 0
+
+    def load(self, ticks, amounts):
+        """
+            Replaces the side with the ticks of a snapshot of the book
+            ticks : int64 array
+            amounts : float64 array, 0 amounts are skipped, the last amount of a repeated tick is kept
+        """
+        self.clear()
+        if len(ticks) == 0:
+            return
+        ticks, last = np.unique(ticks[::-1], return_index=True)
+        amounts = amounts[::-1][last]
+        ticks, amounts = ticks[amounts != 0], amounts[amounts != 0]
+        if len(ticks) == 0:
+            return
+        self.reserve(int(ticks[0]), int(ticks[-1]))
+        indexes = ticks - self.anchor
+        self.amounts[indexes] = amounts
+        # The ticks are sorted, so the levels are summed over one slice
+        levels = indexes // self.block
+        start, end = int(levels[0]), int(levels[-1]) + 1
+        self.sums[start:end] = np.bincount(levels - start, weights=amounts, minlength=end - start)
+        self.counts[start:end] = np.bincount(levels - start, minlength=end - start)
+        self.count = len(ticks)
+        self.lo, self.hi = int(indexes[0]), int(indexes[-1]) + 1
+        # A sorted list is a heap
+        self.heap = (ticks if self.sign == 1 else -ticks[::-1]).tolist()
+
+    def ticks(self):
+        """
+            ticks of the occupied indexes, empty ones included
+        """
+        return np.arange(self.anchor + self.lo, self.anchor + self.hi, dtype=np.int64)
+
+    def items(self):
+        """
+            [(tick, amount)...] in ascending ticks
+        """
+        if self.lo >= self.hi:
+            return []
+        occupied = self.amounts[self.lo:self.hi]
+        indexes = np.flatnonzero(occupied)
+        return list(zip((indexes + self.anchor + self.lo).tolist(), occupied[indexes].tolist()))
+
+    def live(self, tick):
+        i = tick - self.anchor
+        return 0 <= i < len(self.amounts) and self.amounts[i] != 0
+
+    def best(self):
+        """
+            Best tick of the side or None, O(log n) amortized
+        """
+        heap = self.heap
+        while heap and not self.live(self.sign * heap[0]):
+            heapq.heappop(heap)
+        if len(heap) > 2 * self.count + 64:
+            self.rebuild()
+        return self.sign * heap[0] if heap else None
+
+    def top(self, n):
+        """
+            returns: ticks and amounts of the n best ticks, best first
+        """
+        best = self.best()
+        if best is None:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+        i = best - self.anchor
+        span = self.top_span
+        # The array is scanned from the best tick in growing windows until n ticks are found, a mask is faster to scan than the floats
+        while True:
+            if self.sign == 1:
+                start, end = i, min(i + span, self.hi)
+                indexes = np.flatnonzero(self.amounts[start:end] != 0)[:n] + start
+                exhausted = end == self.hi
+            else:
+                start, end = max(i + 1 - span, self.lo), i + 1
+                indexes = np.flatnonzero(self.amounts[start:end] != 0)[::-1][:n] + start
+                exhausted = start == self.lo
+            if len(indexes) == n or exhausted:
+                if len(indexes) != 0:
+                    self.top_span = max(64, 2 * (abs(int(indexes[-1]) - i) + 1))
+                return indexes + self.anchor, self.amounts[indexes]
+            span *= 2
+
+    def rebuild(self):
+        """
+            Heap of the live ticks only
+        """
+        if self.lo >= self.hi:
+            self.heap = []
+            return
+        self.heap = ((np.flatnonzero(self.amounts[self.lo:self.hi]) + self.anchor + self.lo) * self.sign).tolist()
+        heapq.heapify(self.heap)
+
+    def trim(self, keep):
+        """
+            keep : function of an array of ticks to a mask of the ticks to keep, the rest is deleted
+        """
+        if self.lo >= self.hi:
+            return
+        occupied = self.amounts[self.lo:self.hi]
+        occupied[~keep(self.ticks())] = 0
+        # The levels of the trimmed slice are summed again, which also drops the rounding accumulated by the updates
+        start, end = self.lo // self.block, -(-self.hi // self.block)
+        blocks = self.amounts[start * self.block:end * self.block].reshape(-1, self.block)
+        self.sums[start:end] = blocks.sum(axis=1)
+        self.counts[start:end] = np.count_nonzero(blocks, axis=1)
+        indexes = np.flatnonzero(occupied)
+        self.count = len(indexes)
+        if self.count == 0:
+            self.lo, self.hi = len(self.amounts), 0
+        else:
+            self.lo, self.hi = self.lo + int(indexes[0]), self.lo + int(indexes[-1]) + 1
+        self.rebuild()
+
+    def levels(self):
+        """
+            returns: index of the first level, sums of the amounts of the levels from it on
+                     see utilis.flow_level_index for the index of a level
+        """
+        if self.lo >= self.hi:
+            return 0, self.sums[:0]
+        start, end = self.lo // self.block, -(-self.hi // self.block)
+        return (self.anchor - 1) // self.block + start + 1, self.sums[start:end]
+
+
+class heatmap():
+
+    def __init__(self, rows=60, capacity=64, fields=()):
+        """
+            rows : seconds of the window
+            capacity : initial number of levels
+            fields : names of the per second values
+        """
+        self.names = tuple(fields)
+        self.fields = np.zeros((rows, len(self.names)), dtype=np.float64)
+        self.values = np.zeros((rows, capacity), dtype=np.float64)
+        self.seen = np.zeros(capacity, dtype=bool)
+        self.first = None
+        # Bounds of the columns that held a level within the window
+        self.lo = capacity
+        self.hi = 0
+
+    def reserve(self, low, high):
+        """
+            Re-centers the matrix so that the levels low to high (inclusive) and the window fit in it
+        """
+        capacity = self.values.shape[1]
+        if self.first is not None and low >= self.first and high < self.first + capacity:
+            return
+        occupied = self.lo < self.hi
+        if occupied:
+            low = min(low, self.first + self.lo)
+            high = max(high, self.first + self.hi - 1)
+        span = high - low + 1
+        while capacity < 2 * span:
+            capacity *= 2
+        first = low - (capacity - span) // 2
+        values = np.zeros((self.values.shape[0], capacity), dtype=np.float64)
+        seen = np.zeros(capacity, dtype=bool)
+        if occupied:
+            offset = self.first - first
+            values[:, self.lo + offset:self.hi + offset] = self.values[:, self.lo:self.hi]
+            seen[self.lo + offset:self.hi + offset] = self.seen[self.lo:self.hi]
+            self.lo, self.hi = self.lo + offset, self.hi + offset
+        else:
+            self.lo, self.hi = capacity, 0
+        self.values = values
+        self.seen = seen
+        self.first = first
+
+    def write(self, row, first, sums):
+        """
+            row : second of the window
+            first, sums : sums of the levels from first on, see bookside.levels
+        """
+        if self.lo < self.hi:
+            self.values[row, self.lo:self.hi] = 0
+        nonzero = np.flatnonzero(sums)
+        if len(nonzero) == 0:
+            return
+        first, sums = first + int(nonzero[0]), sums[nonzero[0]:nonzero[-1] + 1]
+        self.reserve(first, first + len(sums) - 1)
+        start = first - self.first
+        self.values[row, start:start + len(sums)] = sums
+        self.seen[start:start + len(sums)] |= sums != 0
+        self.lo = min(self.lo, start)
+        self.hi = max(self.hi, start + len(sums))
+
+    def column(self, level):
+        """
+            Column of the level, marked as held within the window
+        """
+        if self.first is None or not 0 <= level - self.first < self.values.shape[1]:
+            self.reserve(level, level)
+        i = level - self.first
+        self.seen[i] = True
+        if i < self.lo:
+            self.lo = i
+        if i >= self.hi:
+            self.hi = i + 1
+        return i
+
+    def add(self, row, level, amount):
+        # The column is taken first, as it may re-center the matrix
+        i = self.column(level)
+        self.values[row, i] += amount
+
+    def put(self, row, level, value):
+        i = self.column(level)
+        self.values[row, i] = value
+
+    def add_columns(self, rows, levels, amounts):
+        """
+            rows, levels, amounts : arrays, amounts of the same row and level are summed
+        """
+        if len(levels) == 0:
+            return
+        self.reserve(int(levels.min()), int(levels.max()))
+        indexes = levels - self.first
+        np.add.at(self.values, (rows, indexes), amounts)
+        self.seen[indexes] = True
+        self.lo = min(self.lo, int(indexes.min()))
+        self.hi = max(self.hi, int(indexes.max()) + 1)
+
+    def columns(self):
+        """
+            returns: levels that held books within the window and a copy of their columns
+        """
+        indexes = self.lo + np.flatnonzero(self.seen[self.lo:self.hi])
+        return indexes + (self.first or 0), self.values[:, indexes]
+
+    def clear(self):
+        if self.lo < self.hi:
+            self.values[:, self.lo:self.hi] = 0
+            self.seen[self.lo:self.hi] = False
+        self.lo, self.hi = self.values.shape[1], 0
+        self.fields[:] = 0
+
+
+class windows():
+
+    def __init__(self, rows=60, fields=()):
+        self.current = heatmap(rows, fields=fields)
+        self.closed = heatmap(rows, fields=fields)
+        self.minutes = 0
+
+    def close(self):
+        """
+            The current window becomes the closed one, the previous closed window is cleared and written next
+        """
+        self.current, self.closed = self.closed, self.current
+        self.current.clear()
+        self.minutes += 1
+
+
+class windowclock():
+
+    def __init__(self, window_ms):
+        """
+            window_ms : milliseconds of a window
+        """
+        self.window_ms = window_ms
+        self.window = None
+        self.closed = None
+        self.late = 0
+        self.skipped = 0
+        self.gap = 0
+
+    def advance(self, timestamp):
+        """
+            timestamp : epoch milliseconds of a message
+            returns: 0 for messages of the current window, 1 when the current window has to be closed first,
+                     -1 for late messages of closed windows, which are not written
+        """
+        window = timestamp // self.window_ms
+        if window == self.window:
+            return 0
+        if self.window is None:
+            self.window = window
+            return 0
+        if window < self.window:
+            self.late += 1
+            return -1
+        self.gap = window - self.window - 1
+        self.skipped += self.gap
+        self.closed = self.window
+        self.window = window
+        return 1
@@ -0,0 +1,134 @@
+"""
+    Declarative schemas of the exchange payloads, compiled once into plain python functions
+
+    tradesschema
+        path : keys from the response to the trade, or to the list of trades if many
+        many : whether path leads to a list of trades
+        side : key of the side in the trade and how to read it
+                    "lower" : lowercased value
+                    None : value as it is
+                    "sign" : "sell" if the amount is negative else "buy"
+                    {value : side, ...}, default : mapping of the value, default for any other value
+        price, amount : keys of the price and the amount in the trade
+        timestamp : keys to the timestamp, from the trade, or from the response if they start with "response"
+        unit : "ms", "s" or "iso" (ISO-8601 strings)
+        absolute : amount is taken as an absolute value
+        converter : name of the unit conversion of the amount, see lookups.unit_conversion_btc
+"""
+
+from collections import namedtuple
+from utilis import iso8601_to_timestamp
+
+tradesschema = namedtuple("tradesschema", ["path", "many", "side", "price", "amount", "timestamp", "unit", "absolute", "converter"],
+                          defaults=("ms", False, None))
+
+timestamp_units = {
+    "ms" : "int({})",
+    "s" : "int(float({}) * 1000)",
+    "iso" : "iso8601_to_timestamp({})",
+}
+
+
+def getter_source(root : str, keys) -> str:
+    """
+        ("data", "events", 0) -> root["data"]["events"][0]
+    """
+    return root + "".join(f"[{key!r}]" for key in keys)
+
+
+def side_source(schema : tradesschema, namespace : dict, suffix : str = "") -> str:
+    key, how = schema.side[0], schema.side[1]
+    value = getter_source("x", (key,))
+    if how is None:
+        return value
+    if how == "lower":
+        return value + ".lower()"
+    if how == "sign":
+        return f'"sell" if float({value}) < 0 else "buy"'
+    namespace["sides" + suffix] = how
+    return f"sides{suffix}.get({value}, {schema.side[2]!r})"
+
+
+def amount_source(schema : tradesschema, conversion, namespace : dict, suffix : str = "") -> str:
+    """
+        conversion : (kind, multiplier), a function of (amount, price) or None
+        Registry conversions are inlined with the same operations as lookups.unit_conversion_kinds
+    """
+    amount = f"float({getter_source('x', (schema.amount,))})"
+    if schema.absolute:
+        amount = f"abs({amount})"
+    if conversion is None:
+        return amount
+    if callable(conversion):
+        namespace["convert" + suffix] = conversion
+        return f"convert{suffix}({amount}, price)"
+    kind, multiplier = conversion
+    if kind == "multiply":
+        return f"{amount} * {multiplier!r}"
+    if kind == "divide_by_price":
+        return f"{amount} * {multiplier!r} / price"
+    raise ValueError(f"Unknown unit conversion kind {kind}")
+
+
+def trades_source(schema : tradesschema, conversion, namespace : dict, suffix : str = "") -> list:
+    """
+        returns: lines of the body that returns the trades of the response, names of the namespace end with suffix
+        A timestamp of the response is read once, before the trades
+    """
+    lines = []
+    if schema.timestamp[0] == "response":
+        lines.append("timestamp = " + timestamp_units[schema.unit].format(getter_source("response", schema.timestamp[1:])))
+        timestamp = "timestamp"
+    else:
+        timestamp = timestamp_units[schema.unit].format(getter_source("x", schema.timestamp))
+    amount = amount_source(schema, conversion, namespace, suffix)
+    # The price is bound only when the conversion needs it
+    price = "float({})".format(getter_source("x", (schema.price,)))
+    if conversion is not None and (callable(conversion) or conversion[0] == "divide_by_price"):
+        price = f"(price := {price})"
+    row = "[{}, {}, {}, {}]".format(side_source(schema, namespace, suffix), price, amount, timestamp)
+    if schema.many:
+        lines.append(f"return [{row} for x in {getter_source('response', schema.path)}]")
+    else:
+        lines.append(f"x = {getter_source('response', schema.path)}")
+        lines.append(f"return [{row}]")
+    return lines
+
+
+def compile_trades_extractor(schema : tradesschema, conversion=None) -> callable:
+    """
+        conversion : (kind, multiplier), a function of (amount, price) or None for no conversion
+        returns: extract(response) -> [[side, price, amount, timestamp]...], raises on payloads that do not follow the schema
+    """
+    namespace = {"iso8601_to_timestamp" : iso8601_to_timestamp}
+    source = "def extract(response):\n" + "".join(f"    {line}\n" for line in trades_source(schema, conversion, namespace))
+    exec(compile(source, f"<trades extractor {schema.path}>", "exec"), namespace)
+    extract = namespace["extract"]
+    extract.source = source
+    return extract
+
+
+def compile_trades_lookup(schemas : dict, loads : callable, errors : tuple) -> callable:
+    """
+        schemas : {insType or (insType, instrument) : (tradesschema, conversion)} of an exchange
+        loads : decoder of str and bytes responses, errors : exceptions of payloads that do not follow the schemas
+        returns: lookup(response) -> [[side, price, amount, timestamp]...] or None
+        The schema is chosen by the insType and instrument of the response in the same function,
+        (insType, instrument) keys first, as lookups.extractors does
+    """
+    namespace = {"iso8601_to_timestamp" : iso8601_to_timestamp, "loads" : loads, "errors" : errors,
+                 "encoded" : (str, bytes, bytearray, memoryview)}
+    lines = ["if isinstance(response, encoded):", "    response = loads(response)", "try:",
+             "    insType = response['insType']", "    instrument = response['instrument']"]
+    keys = sorted(schemas, key=lambda key : not isinstance(key, tuple))
+    for i, key in enumerate(keys):
+        schema, conversion = schemas[key]
+        condition = f"insType == {key[0]!r} and instrument == {key[1]!r}" if isinstance(key, tuple) else f"insType == {key!r}"
+        lines.append(f"    if {condition}:")
+        lines.extend(f"        {line}" for line in trades_source(schema, conversion, namespace, f"_{i}"))
+    lines += ["except errors:", "    return None", "return None"]
+    source = "def lookup(response):\n" + "".join(f"    {line}\n" for line in lines)
+    exec(compile(source, "<trades lookup>", "exec"), namespace)
+    lookup = namespace["lookup"]
+    lookup.source = source
+    return lookup
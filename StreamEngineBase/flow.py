@@ -2,7 +2,10 @@ import numpy as np
 import pandas as pd 
 import datetime
 import json
+import functools
 from utilis import *
+from books import bookside, windows, windowclock
+from lookups import lookup_books, parse_message, parse_depth_batch, parse_trades_batch, parse_liquidations_batch
 
 class booksflow():
     """
@@ -12,112 +15,395 @@ class booksflow():
                 - Computational efficiency
                 - Who books so high if they want to trade now? Challange this statemant ...
             Aggregation explanation:  If the level_size is 20, books between [0-20) go to level 20, [20, 40) go to level 40, and so forth.
+            The book is kept in integer ticks of tick_size by books.bookside arrays, whose blocks are the levels
+            The seconds of the minute are kept in books.windows matrices, df and snapshot are DataFrames built from them when read
+            The window is a minute of seconds by default, with window and bucket_ms current_second and previous_second are rows of bucket_ms
+            Windows follow the event time of the messages (books.windowclock), late messages update the book but not the closed windows
+            Coarse level sizes are block sums of the levels of the same book, see df_at and snapshot_at
+            Snapshots flagged by the lookup (lookups.depthupdate.snapshot) replace both sides of the book at once
+            Snapshots are stamped with the time of the last applied update, REST snapshots are stamped when fetched,
+            ahead of the stream they are applied to. The first snapshot before any update does not start the clock
+            With checksum, the checksums of the exchange are verified against the top of the book and resync is called on a mismatch
     """
-    def __init__(self, exchange : str, symbol : str, insType : str, level_size : int, lookup : callable, book_ceil_thresh=5):
+    def __init__(self, exchange : str, symbol : str, insType : str, level_size : int, lookup : callable, book_ceil_thresh=5, tick_size=0.01, window=60, bucket_ms=1000, coarse_levels=(), checksum=False, checksum_interval=0, resync=None):
         """
             insType : spot, future, perpetual 
             level_size : the magnitude of the level to aggragate upon (measured in unites of the quote to base pair)
             book_ceil_thresh : % ceiling of price levels to ommit, default 5%
-            lookup : a function to get formated timestamp,  bids and asks from a dictionary
+            tick_size : price increment of the instrument, must divide every price and level_size.
+                        0.01 divides the ticks of all the btc instruments
+            window : seconds of the window of the snapshots, default a minute
+            bucket_ms : milliseconds of a row of the window, window * 1000 must be a multiple of it
+            coarse_levels : level sizes to aggregate upon as well, multiples of level_size
+            checksum : verify the checksums of the lookup (lookups.depthupdate.checksum), okx books for now
+            checksum_interval : milliseconds of event time between verified checksums, 0 verifies all of them
+            resync : called as resync(flow) when a checksum does not match, e.g. to request a snapshot of the book
+            lookup : a function to get bids, asks and the epoch milliseconds timestamp from a dictionary
+                     two sided lookups (lookups.two_sided) decode the response once for both sides,
+                     any other lookup is called per side as lookup(response, side)
+            Acks, heartbeats and malformed messages are skipped and counted by lookups.parse_message, as in every flow
         """
         # Identification
         self.exchange = exchange
         self.symbol = symbol
         self.insType = insType
         self.lookup = lookup
+        self.lookup_books = functools.partial(lookup_books, lookup)
         self.level_size = float(level_size)
         self.book_ceil_thresh = book_ceil_thresh
-        self.df = pd.DataFrame()
-        self.B = {"timestamp" : None, "bids" : {}, "asks" : {}}
-        self.snapshot = None
+        self.tick_size = tick_size
+        self.level_ticks = round(self.level_size / tick_size)
+        if abs(self.level_ticks * tick_size - self.level_size) > tick_size * 1e-6:
+            raise ValueError(f"level_size {level_size} is not a multiple of tick_size {tick_size}")
+        self.bucket_ms = bucket_ms
+        self.rows = flow_window_rows(window, bucket_ms)
+        self.clock = windowclock(self.rows * bucket_ms)
+        self.heatmaps = windows(self.rows)
+        # level size : (levels of level_size per level, windows)
+        self.pyramid = {}
+        for size in coarse_levels:
+            factor = round(size / self.level_size)
+            if factor < 2 or abs(factor * self.level_size - size) > tick_size * 1e-6:
+                raise ValueError(f"coarse level {size} is not a multiple of level_size {level_size}")
+            self.pyramid[float(size)] = (factor, windows(self.rows))
+        self.B = {"timestamp" : None, "bids" : bookside(self.level_ticks, descending=True), "asks" : bookside(self.level_ticks)}
+        self.snapshot_frames = {}
         self.previous_second = -1
         self.current_second = 0
         self.price = 0
+        self.checksum = checksum
+        self.resync = resync
+        self.checksum_interval = checksum_interval
+        self.checksum_timestamp = None
+        # Event time of the last applied update that is not a snapshot
+        self.stream_timestamp = None
+        self.snapshot_waiting = False
+        self.checksums_verified = 0
+        self.checksum_mismatches = 0
+        # (tick, amount) : "price:amount" of the levels of the checksums, the top of the book changes little between updates
+        self.level_strings = {}
+        self.tick_decimals = len(number_string(tick_size).partition(".")[2])
 
     
     def update_books(self, books):
         
-        try:
-            bids, timestamp = self.lookup(books, "bids")
-            asks, timestamp = self.lookup(books, "asks")
-        except:
+        books = parse_message(self.lookup_books, books, self.price_band())
+        if books is None:
             return
+        self.apply_books(*books)
 
+    def update_books_batch(self, messages):
+        """
+            messages : a burst of depth responses, parsed into one columnar batch
+            The first update of every bucket is applied alone, as it may take the row of the heatmap,
+            the remaining updates of that bucket are applied at once. A snapshot is applied alone
+            and the update after it as well, as a snapshot may not start the clock (see apply_books)
+        """
+        batch = parse_depth_batch(self.lookup, messages)
+        seconds = batch.timestamp // self.bucket_ms
+        bo, ao = batch.bids_offsets, batch.asks_offsets
+        start = 0
+        while start < len(seconds):
+            end = start + 1
+            while end < len(seconds) and seconds[end] == seconds[start] and not batch.snapshot[start] and not batch.snapshot[end]:
+                end += 1
+            self.apply_books(batch.bids[bo[start]:bo[start+1]], batch.asks[ao[start]:ao[start+1]], int(batch.timestamp[start]),
+                             bool(batch.snapshot[start]), batch.checksum[start])
+            if end > start + 1:
+                # The checksum of the last update holds for the book after the run
+                self.apply_books(batch.bids[bo[start+1]:bo[end]], batch.asks[ao[start+1]:ao[end]], int(batch.timestamp[end-1]),
+                                 checksum=batch.checksum[end-1])
+            start = end
+
+    def price_band(self):
+        """
+            (low, high) prices within book_ceil_thresh of the current mid price, pushed down to the lookup
+            None until both sides of the book are known
+        """
+        price = self.mid
+        if price is None:
+            return None
+        return price * (1 - self.book_ceil_thresh / 100), price * (1 + self.book_ceil_thresh / 100)
+
+    @property
+    def best_bid(self):
+        """
+            Highest bid price, None if there are no bids
+        """
+        tick = self.B['bids'].best()
+        return None if tick is None else round(tick * self.tick_size, self.tick_decimals)
+
+    @property
+    def best_ask(self):
+        """
+            Lowest ask price, None if there are no asks
+        """
+        tick = self.B['asks'].best()
+        return None if tick is None else round(tick * self.tick_size, self.tick_decimals)
+
+    @property
+    def mid(self):
+        """
+            Mid price of the book, None until both sides are known
+            A mid between two ticks takes one more decimal than tick_size
+        """
+        best_bid, best_ask = self.B['bids'].best(), self.B['asks'].best()
+        if best_bid is None or best_ask is None:
+            return None
+        return round((best_bid + best_ask) / 2 * self.tick_size, self.tick_decimals + 1)
+
+    @property
+    def spread(self):
+        """
+            Best ask - best bid, None until both sides are known
+        """
+        best_bid, best_ask = self.B['bids'].best(), self.B['asks'].best()
+        if best_bid is None or best_ask is None:
+            return None
+        return round((best_ask - best_bid) * self.tick_size, self.tick_decimals)
+
+    def apply_books(self, bids, asks, timestamp, snapshot=False, checksum=None):
+        """
+            bids, asks : [[price, amount]...] or arrays of shape (N, 2)
+            timestamp : epoch milliseconds
+            snapshot : bids and asks are the whole book and replace both sides
+            checksum : checksum of the exchange of the book after the update, see verify_checksum
+        """
+        if not snapshot:
+            self.stream_timestamp = timestamp
+        elif self.stream_timestamp is not None:
+            timestamp = self.stream_timestamp
+        # The next message starts the clock, at its own time if it is an update, feeds of snapshots only start with the second one
+        waiting = snapshot and self.stream_timestamp is None and self.clock.window is None and not self.snapshot_waiting
+        self.snapshot_waiting = waiting
         self.B['timestamp'] = timestamp
-        try:
-            self.price = (max(self.B['bids'].keys()) + min(self.B['asks'].keys())) / 2
-        except:
-            self.price = (bids[0][0] + asks[0][0]) / 2
+        if snapshot:
+            bids = np.asarray(bids, dtype=np.float64).reshape(-1, 2)
+            asks = np.asarray(asks, dtype=np.float64).reshape(-1, 2)
+            # The levels of a snapshot are kept around its own mid, the book it replaces may be stale
+            if len(bids) != 0 and len(asks) != 0:
+                self.price = (bids[:, 0].max() + asks[:, 0].min()) / 2
+            else:
+                self.price = self.mid
+        else:
+            self.price = self.mid
+        if self.price is None:
+            try:
+                self.price = (bids[0][0] + asks[0][0]) / 2
+            except:
+                return
          
-        self.update_books_helper(bids, "bids")
-        self.update_books_helper(asks, "asks")
-        
-        self.current_second = datetime.datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').second
+        self.update_books_helper(bids, "bids", snapshot)
+        self.update_books_helper(asks, "asks", snapshot)
+        if checksum is not None and self.checksum:
+            if self.checksum_timestamp is None or timestamp - self.checksum_timestamp >= self.checksum_interval:
+                self.checksum_timestamp = timestamp
+                self.verify_checksum(checksum)
+        if waiting:
+            return
 
+        state = self.clock.advance(timestamp)
+        if state == -1:
+            return
+        if state == 1:
+            self.heatmaps.close()
+            for factor, heatmaps in self.pyramid.values():
+                heatmaps.close()
+            self.snapshot_frames = {}
+            self.previous_second = -1
+            self.level_strings = {}
+            # Delete unnecessary data
+            self.trim_books('bids')
+            self.trim_books('asks')
+
+        # The book of the first update of a row is written, later rows of a window only
+        self.current_second = timestamp_bucket(timestamp, self.bucket_ms, self.rows)
         if self.current_second > self.previous_second:
             self.dfs_input_books()
             self.previous_second = self.current_second
-        if self.previous_second > self.current_second:
-            for col in self.df.columns:
-                self.df[col] = self.df[col].replace(0, pd.NA).ffill()
-                self.df[col] = self.df[col].replace(0, pd.NA).bfill()
-            self.snapshot = self.df.copy()
-            self.df = pd.DataFrame()
-            self.previous_second = self.current_second
-            # Delete unnecessary data
-            booksflow_datatrim(self.price, self.B, 'bids', self.book_ceil_thresh)
-            booksflow_datatrim(self.price, self.B, 'asks', self.book_ceil_thresh)
-            # Start everything all over again
-            self.dfs_input_books()
 
-    def update_books_helper(self, books, side):
+    def update_books_helper(self, books, side, snapshot=False):
         """
           side: bids, asks
+          snapshot : books is the whole side, loaded in place of the side at once
         """
-        # Omit books above 5% from the current price
-        for book in books:
-            p = book[0]
-            a = book[1]
-            if abs(booksflow_compute_percent_variation(p, self.price)) > self.book_ceil_thresh:
-                continue
-            if a == 0:
-                try:
-                    del self.B[side][book[0]]
-                except:
-                    pass
+        # Omit books above 5% from the current price, lookups honoring the price band already skipped most of them
+        if isinstance(books, np.ndarray):
+            # Array lookups are filtered and converted to ticks at once
+            books = books[np.abs(booksflow_compute_percent_variation(books[:, 0], self.price)) <= self.book_ceil_thresh]
+            if snapshot:
+                self.B[side].load(price_ticks(books[:, 0], self.tick_size), books[:, 1])
             else:
-                self.B[side][p] = a
+                self.B[side].update(price_ticks(books[:, 0], self.tick_size), books[:, 1])
+        else:
+            book = self.B[side]
+            for p, a in books:
+                if abs(booksflow_compute_percent_variation(p, self.price)) <= self.book_ceil_thresh:
+                    book.set(round(p / self.tick_size), a)
+
+    def book_checksum(self, depth=25):
+        """
+            Checksum of the top depth levels of the book, see utilis.crc32_book_checksum
+        """
+        sides = []
+        strings = self.level_strings
+        for side in ("bids", "asks"):
+            ticks, amounts = self.B[side].top(depth)
+            levels = []
+            for level in zip(ticks.tolist(), amounts.tolist()):
+                text = strings.get(level)
+                if text is None:
+                    text = strings[level] = number_string(round(level[0] * self.tick_size, self.tick_decimals)) + ":" + number_string(level[1])
+                levels.append(text)
+            sides.append(levels)
+        return crc32_book_checksum(*sides, depth)
+
+    def verify_checksum(self, checksum):
+        """
+            Compares the checksum of the exchange with the one of the book, resync is called if they differ
+        """
+        self.checksums_verified += 1
+        if self.book_checksum() != checksum:
+            self.checksum_mismatches += 1
+            if self.resync is not None:
+                self.resync(self)
+
+    def within_band(self, ticks):
+        """
+            Mask of the ticks within book_ceil_thresh from the current price
+        """
+        return np.abs(booksflow_compute_percent_variation(ticks * self.tick_size, self.price)) <= self.book_ceil_thresh
+
+    def trim_books(self, side):
+        """
+            Deletes the levels of the side above book_ceil_thresh from the current price
+        """
+        self.B[side].trim(self.within_band)
+
+    def book_levels(self):
+        """
+            returns: index of the first level of the book and the sums of the levels from it on, see utilis.flow_level_index
+        """
+        (bids_first, bids), (asks_first, asks) = self.B['bids'].levels(), self.B['asks'].levels()
+        if len(bids) == 0 or len(asks) == 0:
+            return (bids_first, bids) if len(asks) == 0 else (asks_first, asks)
+        first = min(bids_first, asks_first)
+        sums = np.zeros(max(bids_first + len(bids), asks_first + len(asks)) - first, dtype=np.float64)
+        sums[bids_first - first:bids_first - first + len(bids)] += bids
+        sums[asks_first - first:asks_first - first + len(asks)] += asks
+        return first, sums
 
     def dfs_input_books(self):
         """
-            Inputs bids and asks into dfs
+            Inputs the sums of the levels of bids and asks into the current second of the window, and their block sums into the coarse windows
         """
+        first, sums = self.book_levels()
+        self.heatmaps.current.write(self.current_second, first, sums)
+        for factor, heatmaps in self.pyramid.values():
+            heatmaps.current.write(self.current_second, *coarse_level_sums(first, sums, factor))
 
-        prices = np.array(list(map(float, self.B['bids'].keys())) + list(map(float, self.B['asks'].keys())), dtype=np.float64)
-        amounts = np.array(list(map(float, self.B['bids'].values())) + list(map(float, self.B['asks'].values())), dtype=np.float64)
-        levels = [booksflow_find_level(lev, self.level_size) for lev in  prices]
-        unique_levels, inverse_indices = np.unique(levels, return_inverse=True)
-        group_sums = np.bincount(inverse_indices, weights=amounts)
-        columns = [str(col) for col in unique_levels]
+    def level_windows(self, level_size):
+        if float(level_size) == self.level_size:
+            return self.heatmaps
+        return self.pyramid[float(level_size)][1]
 
-        if self.df.empty:
-            self.df = pd.DataFrame(0, index=list(range(60)), columns = columns, dtype='float64')
-            self.df.loc[self.current_second] = group_sums
-            sorted_columns = sorted(map(float, self.df.columns))
-            self.df = self.df[map(str, sorted_columns)]
-        else:
-            old_levels = np.array(self.df.columns, dtype=np.float64)
-            new_levels = np.setdiff1d(np.array(columns, dtype=np.float64), old_levels)
-            for l in new_levels:
-                self.df[str(l)] = 0
-                self.df[str(l)]= self.df[str(l)].astype("float64")
-            sums = booksflow_manipulate_arrays(old_levels, np.array(columns, dtype=np.float64), group_sums)
-            self.df.loc[self.current_second] = sums
-            sorted_columns = sorted(map(float, self.df.columns))
-            self.df = self.df[map(str, sorted_columns)] 
+    def df_at(self, level_size):
+        """
+            DataFrame of the current minute at level_size, level_size or one of coarse_levels
+        """
+        return flow_frame(self.level_windows(level_size).current, level_size)
+
+    def snapshot_at(self, level_size):
+        """
+            DataFrame of the last minute at level_size with empty seconds filled, None until a minute is over
+        """
+        heatmaps = self.level_windows(level_size)
+        if heatmaps.minutes == 0:
+            return None
+        if float(level_size) not in self.snapshot_frames:
+            self.snapshot_frames[float(level_size)] = flow_frame(heatmaps.closed, float(level_size), fill_values=True)
+        return self.snapshot_frames[float(level_size)]
+
+    @property
+    def df(self):
+        """
+            DataFrame of the current minute
+        """
+        return self.df_at(self.level_size)
 
+    @property
+    def snapshot(self):
+        """
+            DataFrame of the last minute with empty seconds filled, None until a minute is over
+        """
+        return self.snapshot_at(self.level_size)
 
 
+class coalescedbooksflow(booksflow):
+    """
+        booksflow for chatty depth feeds with a few levels per message (kucoin perpetual, bingx, gateio)
+        The first update of every second is applied alone, as it takes the second of the heatmap,
+        the remaining updates of that second are merged per level and applied as one net update
+        when the next second starts, a snapshot arrives, once max_buffer levels are waiting or when the frames are read
+        Feeds of whole API books only (bingx perpetual, gateio perpetual) have nothing to coalesce, they use booksflow
+    """
+    def __init__(self, exchange : str, symbol : str, insType : str, level_size : int, lookup : callable, book_ceil_thresh=5, max_buffer=1000, tick_size=0.01, window=60, bucket_ms=1000, coarse_levels=(), checksum=False, checksum_interval=0, resync=None):
+        """
+            max_buffer : number of buffered levels that forces an update within the second
+        """
+        super().__init__(exchange, symbol, insType, level_size, lookup, book_ceil_thresh, tick_size, window, bucket_ms, coarse_levels, checksum=checksum, checksum_interval=checksum_interval, resync=resync)
+        self.max_buffer = max_buffer
+        self.buffer = {"timestamp" : None, "bids" : {}, "asks" : {}, "checksum" : None}
+        self.buffer_second = None
+        self.band = None
+
+    def update_books(self, books):
+        # The price band is taken once per second
+        books = parse_message(self.lookup_books, books, self.band)
+        if books is None:
+            return
+        bids, asks, timestamp, snapshot, checksum = books
+        second = timestamp // self.bucket_ms
+        # Snapshots replace the book, so the buffered levels are applied before them
+        if second != self.buffer_second or snapshot:
+            self.flush_books()
+            self.apply_books(bids, asks, timestamp, snapshot, checksum)
+            # Snapshots are keyed on the time apply_books stamped them with, one that did not start the clock leaves the next update alone
+            self.buffer_second = None if self.snapshot_waiting else self.B['timestamp'] // self.bucket_ms
+            self.band = self.price_band()
+            return
+        self.buffer["timestamp"] = timestamp
+        # The checksum of the last buffered update holds for the book once the buffer is applied
+        self.buffer["checksum"] = checksum
+        for side, levels in (("bids", bids), ("asks", asks)):
+            buffered = self.buffer[side]
+            for price, amount in (levels.tolist() if isinstance(levels, np.ndarray) else levels):
+                buffered[price] = amount
+        if len(self.buffer["bids"]) + len(self.buffer["asks"]) >= self.max_buffer:
+            self.flush_books()
+
+    def update_books_batch(self, messages):
+        self.flush_books()
+        super().update_books_batch(messages)
+
+    def flush_books(self):
+        """
+            Applies the buffered levels as one update
+        """
+        if self.buffer["timestamp"] is None:
+            return
+        self.apply_books(list(self.buffer["bids"].items()), list(self.buffer["asks"].items()), self.buffer["timestamp"],
+                         checksum=self.buffer["checksum"])
+        self.buffer = {"timestamp" : None, "bids" : {}, "asks" : {}, "checksum" : None}
+
+    def df_at(self, level_size):
+        self.flush_books()
+        return super().df_at(level_size)
+
+    def snapshot_at(self, level_size):
+        self.flush_books()
+        return super().snapshot_at(level_size)
+
 
 class tradesflow():
     """
@@ -126,23 +412,27 @@ class tradesflow():
             Aggregation explanation:  If the level_size is 20, books between [0-20) go to level 20, [20, 40) go to level 40, and so forth.
     """
 
-    def __init__(self, exchange : str, symbol : str, insType : str, level_size : int, lookup : callable):
+    def __init__(self, exchange : str, symbol : str, insType : str, level_size : int, lookup : callable, window=60, bucket_ms=1000):
         """
             insType : spot, future, perpetual 
             level_size : the magnitude of the level to aggragate upon (measured in unites of the quote to base pair)
             lookup : function to extract details from the response
+            window : seconds of the window of the snapshots, default a minute
+            bucket_ms : milliseconds of a row of the window, window * 1000 must be a multiple of it
         """
         self.exchange = exchange
         self.symbol = symbol
         self.insType = insType
         self.level_size = float(level_size)
         self.lookup = lookup
-        self.buys = pd.DataFrame(0, index=list(range(0, 60, 1)) , columns=np.array(['price']), dtype='float64')
-        self.sells = pd.DataFrame(0, index=list(range(0, 60, 1)) , columns=np.array(['price']), dtype='float64')
-        self.snapshot_buys = None
-        self.snapshot_sells = None
-        self.snapshot_total = None
-        self.previous_second = -1
+        self.bucket_ms = bucket_ms
+        self.rows = flow_window_rows(window, bucket_ms)
+        self.buys_windows = windows(self.rows, fields=("price",))
+        self.sells_windows = windows(self.rows, fields=("price",))
+        self.clock = windowclock(self.rows * bucket_ms)
+        # Rows of closed windows that were not written, the clock counts messages
+        self.late = 0
+        self.snapshots = {}
         self.current_second = 0
         self.numberBuyTrades = 0
         self.numberSellTrades = 0
@@ -150,20 +440,58 @@ class tradesflow():
         self.sellTrades = dict()
 
     def input_trades(self, data) :
-        try:
-            for trade in self.lookup(data):
-                try:
-                    side, price, amount, timestamp = trade
-                    self.dfs_input_trade(side, price, amount, timestamp)
-                except:
-                    pass
-        except:
+        trades = parse_message(self.lookup, data)
+        if trades is None:
             return
+        # Columnar trades from array lookups
+        if isinstance(trades, tuple):
+            trades = zip(*[column.tolist() for column in trades])
+        # Trades of a message are applied in event time, some exchanges send the newest first
+        for trade in sorted(trades, key=lambda trade: trade[3]):
+            side, price, amount, timestamp = trade
+            self.dfs_input_trade(side, price, amount, timestamp)
+
+    def input_trades_batch(self, messages):
+        """
+            messages : a burst of trades responses, parsed into one columnar batch
+            Trades are written window by window at once
+        """
+        batch = parse_trades_batch(self.lookup, messages)
+        order = flow_message_order(batch.timestamp, batch.offsets)
+        batch = batch._replace(side=batch.side[order], price=batch.price[order], amount=batch.amount[order], timestamp=batch.timestamp[order])
+        seconds = timestamp_bucket(batch.timestamp, self.bucket_ms, self.rows)
+        for minute in flow_split_windows(batch.timestamp // self.clock.window_ms):
+            state = self.clock.advance(int(batch.timestamp[minute.start]))
+            if state == -1:
+                self.late += minute.stop - minute.start
+                continue
+            if state == 1:
+                self.snapshot_trades()
+            self.dfs_input_trades_columns(batch.side[minute], batch.price[minute], batch.amount[minute], seconds[minute])
 
+    def dfs_input_trades_columns(self, side, price, amount, seconds):
+        """
+            Vectorized dfs_input_trade for trades of the same minute
+        """
+        self.current_second = int(seconds[-1])
+        buys = side == "buy"
+        sells = side == "sell"
+        self.numberBuyTrades += int(buys.sum())
+        self.numberSellTrades += int(sells.sum())
+        for mask, trades, heatmaps in ((buys, self.buyTrades, self.buys_windows), (sells, self.sellTrades, self.sells_windows)):
+            for second, a in zip(seconds[mask].tolist(), amount[mask].tolist()):
+                trades.setdefault(second, []).append(a)
+            flow_input_trades(heatmaps.current, seconds[mask], price[mask], amount[mask], self.level_size)
 
     def dfs_input_trade(self, side, price, amount, timestamp):
 
-        self.current_second = int(datetime.datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').second)
+        state = self.clock.advance(timestamp)
+        if state == -1:
+            self.late += 1
+            return
+        if state == 1:
+            self.snapshot_trades()
+        self.current_second = timestamp_bucket(timestamp, self.bucket_ms, self.rows)
 
         # Count number of trades
         if side == "buy":
@@ -180,70 +508,66 @@ class tradesflow():
             if self.current_second not in self.sellTrades:
                 self.sellTrades[self.current_second] = []
             self.sellTrades[self.current_second].append(amount)    
-        
-        if self.previous_second > self.current_second:
-
-            self.numberBuyTrades = 0
-            self.numberSellTrades = 0
-            self.buyTrades = dict()
-            self.sellTrades = dict()
-
-            self.snapshot_buys = self.buys.copy()
-            self.snapshot_buys.fillna(0, inplace = True)
-            self.snapshot_sells = self.sells.copy()
-            self.snapshot_sells.fillna(0, inplace = True)
-            
-            self.snapshot_buys['price'] = self.snapshot_buys['price'].replace(0, pd.NA).ffill()
-            self.snapshot_buys['price'] = self.snapshot_buys['price'].replace(0, pd.NA).bfill()
-            self.snapshot_sells['price'] = self.snapshot_sells['price'].replace(0, pd.NA).ffill()
-            self.snapshot_sells['price'] = self.snapshot_sells['price'].replace(0, pd.NA).bfill()
-
-            merged_df = pd.merge(self.snapshot_buys.copy(), self.snapshot_sells.copy(), left_index=True, right_index=True, how='outer', suffixes=('_buys', '_sells')).fillna(0)
-            
-            common_columns_dic = {column.split("_")[0] : [] for column in merged_df.columns.tolist()}
-            for column in merged_df.columns.tolist():
-                common_columns_dic[column.split("_")[0]].append(column)
-
-            self.snapshot_total = pd.DataFrame()
-            for common_columns in common_columns_dic.keys():
-                for index, column in enumerate(common_columns_dic[common_columns]):
-                    if index == 0 and "price" not in column:
-                        self.snapshot_total[common_columns] = merged_df[column]
-                    if "price" not in column and index != 0:
-                        self.snapshot_total[common_columns] = self.snapshot_total[common_columns] + merged_df[column]
-            self.snapshot_total.insert(0, 'price', self.snapshot_buys['price'])
 
-    
-            self.buys = pd.DataFrame(0, index=list(range(0, 60, 1)) , columns=np.array(['price']), dtype='float64')
-            self.sells = pd.DataFrame(0, index=list(range(0, 60, 1)) , columns=np.array(['price']), dtype='float64')
-
-        self.previous_second = self.current_second
-
-        if side == 'buy':
-            self.buys.loc[self.current_second, 'price'] = price
-            level = booksflow_find_level(price, self.level_size)
-            current_columns = (map(float, [x for x in self.buys.columns.tolist() if x != "price"]))
-            if level not in current_columns:
-                self.buys[str(level)] = 0
-                self.buys[str(level)] = self.buys[str(level)].astype("float64")
-                self.buys.loc[self.current_second, str(level)] += amount
-            else:
-                self.buys.loc[self.current_second, str(level)] += amount
+        if side == 'buy' or side == 'sell':
+            window = self.buys_windows.current if side == 'buy' else self.sells_windows.current
+            window.fields[self.current_second, 0] = price
+            window.add(self.current_second, flow_level_index(price, self.level_size), amount)
 
-        
-        if side == 'sell':
-            self.sells.loc[self.current_second, 'price'] = price
-            level = booksflow_find_level(price, self.level_size)
-            current_columns = (map(float, [x for x in self.sells.columns.tolist() if x != "price"]))
-            if level not in current_columns:
-                self.sells[str(level)] = 0
-                self.sells[str(level)] = self.sells[str(level)].astype("float64")
-                self.sells.loc[self.current_second, str(level)] += amount
-            else:
-                self.sells.loc[self.current_second, str(level)] += amount
+    def snapshot_trades(self):
+        """
+            Closes the minute
+        """
+        self.numberBuyTrades = 0
+        self.numberSellTrades = 0
+        self.buyTrades = dict()
+        self.sellTrades = dict()
+
+        self.buys_windows.close()
+        self.sells_windows.close()
+        self.snapshots = {}
 
+    @property
+    def buys(self):
+        return flow_frame(self.buys_windows.current, self.level_size)
 
+    @property
+    def sells(self):
+        return flow_frame(self.sells_windows.current, self.level_size)
 
+    @property
+    def snapshot_buys(self):
+        """
+            Buys of the last minute with the price filled, None until a minute is over
+            attrs window and gap tell which minute it is, see flow_stamp_frame
+        """
+        if self.buys_windows.minutes == 0:
+            return None
+        if "buys" not in self.snapshots:
+            self.snapshots["buys"] = flow_stamp_frame(flow_frame(self.buys_windows.closed, self.level_size, fill_fields=True), self.clock)
+        return self.snapshots["buys"]
+
+    @property
+    def snapshot_sells(self):
+        if self.sells_windows.minutes == 0:
+            return None
+        if "sells" not in self.snapshots:
+            self.snapshots["sells"] = flow_stamp_frame(flow_frame(self.sells_windows.closed, self.level_size, fill_fields=True), self.clock)
+        return self.snapshots["sells"]
+
+    @property
+    def snapshot_total(self):
+        """
+            Buys and sells of the last minute summed by level, with the price of the buys
+        """
+        if self.buys_windows.minutes == 0:
+            return None
+        if "total" not in self.snapshots:
+            levels, values = flow_add_columns(*self.buys_windows.closed.columns(), *self.sells_windows.closed.columns())
+            total = pd.DataFrame(values, index=list(range(len(values))), columns=[str(float(level * self.level_size)) for level in levels.tolist()])
+            total.insert(0, 'price', self.snapshot_buys['price'])
+            self.snapshots["total"] = flow_stamp_frame(total, self.clock)
+        return self.snapshots["total"]
 
 
 
@@ -256,13 +580,15 @@ class oiFundingflow():
             Aggregation explanation:  If the level_size is 20, books between [0-20) go to level 20, [20, 40) go to level 40, and so forth.
     """
 
-    def __init__(self, exchange : str, symbol : str, insType : str, level_size : int, lookup_oi : callable, lookup_funding : callable = None):
+    def __init__(self, exchange : str, symbol : str, insType : str, level_size : int, lookup_oi : callable, lookup_funding : callable = None, window=60, bucket_ms=1000):
         """
             insType : spot, future, perpetual 
             level_size : the magnitude of the level to aggragate upon (measured in unites of the quote to base pair
-            lookup : a function that returns formated oi with timestamp from response
+            lookup : a function that returns oi with the epoch milliseconds timestamp from response
             Some apis fetch both funding and oi altogether, most doesn't. 
             If api does, lookup_oi should look for both funding and oi 
+            window : seconds of the window of the snapshots, default a minute
+            bucket_ms : milliseconds of a row of the window, window * 1000 must be a multiple of it
         """
         self.exchange = exchange
         self.symbol = symbol
@@ -270,9 +596,13 @@ class oiFundingflow():
         self.level_size = float(level_size)
         self.lookup_oi = lookup_oi
         self.lookup_funding = lookup_funding
-        self.raw_data = pd.DataFrame(0, index=list(range(0, 60, 1)) , columns=np.array(['price', 'fundingRate', "oi"]), dtype='float64')
-        self.snapshot = None
-        self.previous_second = -1
+        self.bucket_ms = bucket_ms
+        self.rows = flow_window_rows(window, bucket_ms)
+        self.raw_windows = windows(self.rows, fields=("price", "fundingRate", "oi"))
+        self.clock = windowclock(self.rows * bucket_ms)
+        # Rows of closed windows that were not written, the clock counts messages
+        self.late = 0
+        self.snapshot_frame = None
         self.current_second = 0
         self.previous_oi = None
         self.fundingRate = 0
@@ -280,31 +610,38 @@ class oiFundingflow():
 
     
     def input_oi_funding(self, oifundingdata):
-        try:
-            funding, openInterestValue, price, timestamp = self.lookup_oi(oifundingdata)
-            self.fundingRate = funding
-            self.dfs_input(openInterestValue, price, timestamp)
-        except:
+        oifunding = parse_message(self.lookup_oi, oifundingdata)
+        if oifunding is None:
             return
+        funding, openInterestValue, price, timestamp = oifunding
+        self.fundingRate = funding
+        self.dfs_input(openInterestValue, price, timestamp)
 
     def input_funding(self, fundingdata):
-        try:
-            funding, price, timestamp = self.lookup_funding(fundingdata)
-            self.fundingRate = funding
-        except:
+        funding = parse_message(self.lookup_funding, fundingdata)
+        if funding is None:
             return
+        funding, price, timestamp = funding
+        self.fundingRate = funding
     
     def input_oi(self, oidata):
-        try:
-            oi, price, timestamp = self.lookup_oi(oidata)
-            self.dfs_input(oi, price, timestamp)
-        except:
+        oi = parse_message(self.lookup_oi, oidata)
+        if oi is None:
             return
+        oi, price, timestamp = oi
+        self.dfs_input(oi, price, timestamp)
     
 
     def dfs_input(self, oi, price, timestamp):
-        
-        self.current_second = int(datetime.datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').second)
+
+        state = self.clock.advance(timestamp)
+        if state == -1:
+            self.late += 1
+            return
+        if state == 1:
+            self.raw_windows.close()
+            self.snapshot_frame = None
+        self.current_second = timestamp_bucket(timestamp, self.bucket_ms, self.rows)
 
         if self.previous_oi == None:
             self.previous_oi = oi
@@ -312,29 +649,28 @@ class oiFundingflow():
         amount = oi - self.previous_oi
         self.current_oi = oi
 
-        if self.previous_second > self.current_second:
-            self.snapshot = self.raw_data.copy()
-            self.snapshot.fillna(0, inplace = True)
-            for col in ['price', 'fundingRate', "oi"]:
-                self.snapshot[col] = self.snapshot[col].replace(0, pd.NA).ffill()
-                self.snapshot[col] = self.snapshot[col].replace(0, pd.NA).bfill()
-            self.raw_data = pd.DataFrame(0, index=list(range(0, 60, 1)) , columns=np.array(['price', 'fundingRate', "oi"]), dtype='float64')
-        self.previous_second = self.current_second
-
-        self.raw_data.loc[self.current_second, 'price'] = price
-        level = booksflow_find_level(price, self.level_size)
-        current_columns = (map(float, [x for x in self.raw_data.columns.tolist() if x not in ['price', 'fundingRate', "oi"]]))
-        if level not in current_columns:
-            self.raw_data[str(level)] = 0
-            self.raw_data[str(level)] = self.raw_data[str(level)].astype("float64")
-            self.raw_data.loc[self.current_second, str(level)] = amount
-        else:
-            self.raw_data.loc[self.current_second, str(level)] = amount
-        self.raw_data.loc[self.current_second, "oi"] = oi
-        self.raw_data.loc[self.current_second, "fundingRate"] = self.fundingRate
+        window = self.raw_windows.current
+        window.fields[self.current_second] = (price, self.fundingRate, oi)
+        window.put(self.current_second, flow_level_index(price, self.level_size), amount)
 
         self.previous_oi = oi
 
+    @property
+    def raw_data(self):
+        return flow_frame(self.raw_windows.current, self.level_size)
+
+    @property
+    def snapshot(self):
+        """
+            Last minute with price, fundingRate and oi filled, None until a minute is over
+            attrs window and gap tell which minute it is, see flow_stamp_frame
+        """
+        if self.raw_windows.minutes == 0:
+            return None
+        if self.snapshot_frame is None:
+            self.snapshot_frame = flow_stamp_frame(flow_frame(self.raw_windows.closed, self.level_size, fill_fields=True), self.clock)
+        return self.snapshot_frame
+
 
 
 class liquidationsflow():
@@ -344,22 +680,26 @@ class liquidationsflow():
             Aggregation explanation:  If the level_size is 20, books between [0-20) go to level 20, [20, 40) go to level 40, and so forth.
     """
 
-    def __init__(self, exchange : str, symbol : str, insType : str, level_size : int, lookup : callable):
+    def __init__(self, exchange : str, symbol : str, insType : str, level_size : int, lookup : callable, window=60, bucket_ms=1000):
         """
             insType : spot, future, perpetual 
             level_size : the magnitude of the level to aggragate upon (measured in unites of the quote to base pair)
+            window : seconds of the window of the snapshots, default a minute
+            bucket_ms : milliseconds of a row of the window, window * 1000 must be a multiple of it
         """
         self.exchange = exchange
         self.symbol = symbol
         self.insType = insType
         self.level_size = float(level_size)
         self.lookup = lookup
-        self.longs = pd.DataFrame(0, index=list(range(0, 60, 1)) , columns=np.array(['price']), dtype="float64")
-        self.shorts = pd.DataFrame(0, index=list(range(0, 60, 1)) , columns=np.array(['price']), dtype="float64")
-        self.snapshot_longs = None
-        self.snapshot_shorts = None
-        self.snapshot_total = None
-        self.previous_second = -1
+        self.bucket_ms = bucket_ms
+        self.rows = flow_window_rows(window, bucket_ms)
+        self.longs_windows = windows(self.rows, fields=("price",))
+        self.shorts_windows = windows(self.rows, fields=("price",))
+        self.clock = windowclock(self.rows * bucket_ms)
+        # Rows of closed windows that were not written, the clock counts messages
+        self.late = 0
+        self.snapshots = {}
         self.current_second = 0
         self.longsCount = 0
         self.shortsCount = 0
@@ -368,19 +708,57 @@ class liquidationsflow():
 
 
     def input_liquidations(self, data):
-        try:
-            for liq in self.lookup(data):
-                side = liq[0]
-                price = liq[1]
-                amount = liq[2]
-                timestamp = liq[3]
-                self.dfs_input_liquidations(side, price, amount, timestamp)
-        except:
-            pass
+        liquidations = parse_message(self.lookup, data)
+        if liquidations is None:
+            return
+        for liq in sorted(liquidations, key=lambda liq: liq[3]):
+            side = liq[0]
+            price = liq[1]
+            amount = liq[2]
+            timestamp = liq[3]
+            self.dfs_input_liquidations(side, price, amount, timestamp)
+
+    def input_liquidations_batch(self, messages):
+        """
+            messages : a burst of liquidations responses, parsed into one columnar batch
+            Liquidations are written window by window at once
+        """
+        batch = parse_liquidations_batch(self.lookup, messages)
+        order = flow_message_order(batch.timestamp, batch.offsets)
+        batch = batch._replace(side=batch.side[order], price=batch.price[order], amount=batch.amount[order], timestamp=batch.timestamp[order])
+        seconds = timestamp_bucket(batch.timestamp, self.bucket_ms, self.rows)
+        for minute in flow_split_windows(batch.timestamp // self.clock.window_ms):
+            state = self.clock.advance(int(batch.timestamp[minute.start]))
+            if state == -1:
+                self.late += minute.stop - minute.start
+                continue
+            if state == 1:
+                self.snapshot_liquidations()
+            self.dfs_input_liquidations_columns(batch.side[minute], batch.price[minute], batch.amount[minute], batch.timestamp[minute], seconds[minute])
+
+    def dfs_input_liquidations_columns(self, side, price, amount, timestamp, seconds):
+        """
+            Vectorized dfs_input_liquidations for liquidations of the same minute
+        """
+        self.current_second = int(seconds[-1])
+        longs = side == "buy"
+        shorts = side == "sell"
+        self.longsCount += int(longs.sum())
+        self.shortsCount += int(shorts.sum())
+        for mask, liquidations, heatmaps in ((longs, self.longsList, self.longs_windows), (shorts, self.shortsList, self.shorts_windows)):
+            for t, a in zip(timestamp[mask].tolist(), amount[mask].tolist()):
+                liquidations.setdefault(t, []).append(a)
+            flow_input_trades(heatmaps.current, seconds[mask], price[mask], amount[mask], self.level_size)
 
     def dfs_input_liquidations(self, side, price, amount, timestamp):
 
-        self.current_second = int(datetime.datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').second)
+        state = self.clock.advance(timestamp)
+        if state == -1:
+            self.late += 1
+            return
+        if state == 1:
+            self.snapshot_liquidations()
+        self.current_second = timestamp_bucket(timestamp, self.bucket_ms, self.rows)
 
         if side == "sell":
             if timestamp not in self.shortsList:
@@ -393,49 +771,59 @@ class liquidationsflow():
             self.longsList[timestamp].append(amount)
             self.longsCount += 1
 
-        if self.previous_second > self.current_second:
-
-            self.longsCount = 0
-            self.shortsCount = 0
-            self.longsList = dict()
-            self.shortsList = dict()
-
-            self.snapshot_longs = self.longs.copy()
-            self.snapshot_shorts = self.longs.copy()
-            self.snapshot_total = self.longs.copy() + self.shorts.copy()
-            
-            for col in ['price']:
-                self.longs[col] = self.longs[col].ffill()
-                self.longs[col] = self.longs[col].bfill()
-                self.shorts[col] = self.shorts[col].ffill()
-                self.shorts[col] = self.shorts[col].bfill()
-
-            self.longs = pd.DataFrame(0, index=list(range(0, 60, 1)) , columns=np.array(['price']), dtype="float64")
-            self.shorts = pd.DataFrame(0, index=list(range(0, 60, 1)) , columns=np.array(['price']), dtype="float64")
-        
-        self.previous_second = self.current_second
+        if side == "buy" or side == "sell":
+            window = self.longs_windows.current if side == "buy" else self.shorts_windows.current
+            window.fields[self.current_second, 0] = price
+            window.add(self.current_second, flow_level_index(price, self.level_size), amount)
 
-        if side == "buy":
-            self.longs.loc[self.current_second, 'price'] = price
-            level = booksflow_find_level(price, self.level_size)
-            current_columns = (map(float, [x for x in self.longs.columns.tolist() if x != "price"]))
-            if level not in current_columns:
-                self.longs[str(level)] = 0
-                self.longs[str(level)] = self.longs[str(level)].astype("float64")
-                self.longs.loc[self.current_second, str(level)] += amount
-            else:
-                self.longs.loc[self.current_second, str(level)] += amount
+    def snapshot_liquidations(self):
+        """
+            Closes the minute
+        """
+        self.longsCount = 0
+        self.shortsCount = 0
+        self.longsList = dict()
+        self.shortsList = dict()
 
-        if side == "sell":
-            self.shorts.loc[self.current_second, 'price'] = price
-            level = booksflow_find_level(price, self.level_size)
-            current_columns = (map(float, [x for x in self.shorts.columns.tolist() if x != "price"]))
-            if level not in current_columns:
-                self.shorts[str(level)] = 0
-                self.shorts[str(level)] = self.shorts[str(level)].astype("float64")
-                self.shorts.loc[self.current_second, str(level)] += amount
-            else:
-                self.shorts.loc[self.current_second, str(level)] += amount
+        self.longs_windows.close()
+        self.shorts_windows.close()
+        self.snapshots = {}
+
+    @property
+    def longs(self):
+        return flow_frame(self.longs_windows.current, self.level_size)
+
+    @property
+    def shorts(self):
+        return flow_frame(self.shorts_windows.current, self.level_size)
+
+    @property
+    def snapshot_longs(self):
+        """
+            Longs of the last minute, None until a minute is over
+            attrs window and gap tell which minute it is, see flow_stamp_frame
+        """
+        if self.longs_windows.minutes == 0:
+            return None
+        if "longs" not in self.snapshots:
+            self.snapshots["longs"] = flow_stamp_frame(flow_frame(self.longs_windows.closed, self.level_size), self.clock)
+        return self.snapshots["longs"]
+
+    @property
+    def snapshot_shorts(self):
+        if self.shorts_windows.minutes == 0:
+            return None
+        if "shorts" not in self.snapshots:
+            self.snapshots["shorts"] = flow_stamp_frame(flow_frame(self.shorts_windows.closed, self.level_size), self.clock)
+        return self.snapshots["shorts"]
+
+    @property
+    def snapshot_total(self):
+        if self.longs_windows.minutes == 0:
+            return None
+        if "total" not in self.snapshots:
+            self.snapshots["total"] = flow_stamp_frame(self.snapshot_longs + self.snapshot_shorts, self.clock)
+        return self.snapshots["total"]
 
 
 
@@ -446,6 +834,8 @@ class oiflowOption():
             example:
                 pranges = np.array([0.0, 1.0, 2.0, 5.0, 10.0])  : percentage ranges of strikes from current price
                 expiry_windows = np.array([0.0, 1.0, 3.0, 7.0])  : expiration window ranges
+            lookup : two sided option lookups (lookups.option_chain) walk the chain once for calls and puts,
+                     any other lookup is called per side as lookup(response, side)
 
         """
         self.exchange = exchange
@@ -458,15 +848,32 @@ class oiflowOption():
         self.df_put = dict()
 
     def input_oi(self, data):
-        try:
-            self.input_oi_helper(data, "C")
-            self.input_oi_helper(data, "P")
-        except:
-            return
+        if getattr(self.lookup, "two_sided", False):
+            chain = parse_message(self.lookup, data)
+            if chain is None:
+                return
+            self.input_oi_helper(*chain.calls, chain.price, chain.timestamp, "C")
+            self.input_oi_helper(*chain.puts, chain.price, chain.timestamp, "P")
+        else:
+            # Both sides are read from one parsed message, so that it is counted once
+            sides = parse_message(self.lookup_sides, data)
+            if sides is None:
+                return
+            calls, puts = sides
+            self.input_oi_helper(*calls, "C")
+            self.input_oi_helper(*puts, "P")
+
+    def lookup_sides(self, response):
+        """
+            Calls and puts of a lookup called per side, None if either of them is
+        """
+        calls, puts = self.lookup(response, "C"), self.lookup(response, "P")
+        if calls is None or puts is None:
+            return None
+        return calls, puts
 
-    def input_oi_helper(self, data : dict, side : str):
-        strikes, countdowns, oi, price, timestamp = self.lookup(data, side)
-        timestamp = datetime.datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').replace(minute=0, second=0)
+    def input_oi_helper(self, strikes, countdowns, oi, price, timestamp, side : str):
+        timestamp = datetime.datetime.fromtimestamp(timestamp / 1000).replace(minute=0, second=0, microsecond=0)
         options_data = {"strikes" : strikes, "countdown" :countdowns, "oi" : oi}
         df = pd.DataFrame(options_data).groupby(['countdown', 'strikes']).sum().reset_index()
         df = df[(df != 0).all(axis=1)]
@@ -527,8 +934,11 @@ class indicatorflow():
         """
             Needs to be used for global tradesrs accountrs, positions and top traders accounts and positions of binance
         """
-        longAccount, shortAccount, longShortRation, price, timestamp = self.lookup(data)
-        self.data["timestamp"] = timestamp
+        data = parse_message(self.lookup, data)
+        if data is None:
+            return
+        longAccount, shortAccount, longShortRation, price, timestamp = data
+        self.data["timestamp"] = timestamp_format(timestamp)
         self.data["longAccount"]  = longAccount
         self.data["shortAccount"]  = shortAccount
         self.data["ratio"]  = longShortRation
@@ -538,8 +948,11 @@ class indicatorflow():
         """
             Processor of bybit global traders buy adn sell ratio
         """
-        buyRation, sellRation, price, timestamp = self.lookup(data)
-        self.data["timestamp"] = timestamp
+        data = parse_message(self.lookup, data)
+        if data is None:
+            return
+        buyRation, sellRation, price, timestamp = data
+        self.data["timestamp"] = timestamp_format(timestamp)
         self.data["ratio"]  = buyRation / sellRation
         self.data["price"]  = price
 
@@ -547,7 +960,10 @@ class indicatorflow():
         """
             OKx's ration is about all BTC futures contracts
         """
-        ratio, price, timestamp = self.lookup(data)
-        self.data["timestamp"] = timestamp
+        data = parse_message(self.lookup, data)
+        if data is None:
+            return
+        ratio, price, timestamp = data
+        self.data["timestamp"] = timestamp_format(timestamp)
         self.data["ratio"]  = ratio
         self.data["price"]  = price
\ No newline at end of file
@@ -1,62 +1,476 @@
 import json
 import numpy as np
 import datetime
-from dateutil import parser
-import arrow
+import functools
+import inspect
+from collections import namedtuple, defaultdict, Counter
 from typing import Tuple
-from utilis import calculate_option_time_to_expire_deribit, calculate_option_time_to_expire_okex, calculate_option_time_to_expire_bybit
+from utilis import option_instrument, option_countdowns, iso8601_to_timestamp
+from extractors import tradesschema, compile_trades_extractor, compile_trades_lookup
+
+
+def json_loads_stdlib(response) -> dict:
+    """
+        stdlib decoder, accepts str, bytes, bytearray, memoryview
+    """
+    if isinstance(response, memoryview):
+        response = response.tobytes()
+    return json.loads(response)
+
+# Decoder backends, the fastest available one is chosen once at import
+json_decoders = {"json" : json_loads_stdlib}
+try:
+    import orjson
+    # Accepts str, bytes, bytearray, memoryview. Integers above 64 bits are decoded as floats (htx trade ids), none of them is used by the lookups
+    json_decoders["orjson"] = orjson.loads
+except ImportError:
+    pass
+json_backend = "orjson" if "orjson" in json_decoders else "json"
+json_loads = json_decoders[json_backend]
+
+
+# Errors of payloads without the keys, items or values a lookup reads, lookups return None on them
+parse_errors = (KeyError, IndexError, TypeError, ValueError, AttributeError)
+
+
+def decode_response(response) -> dict:
+    """
+        str, bytes and memoryview are decoded with json_loads, already decoded mappings pass through
+    """
+    if isinstance(response, (str, bytes, bytearray, memoryview)):
+        return json_loads(response)
+    return response
+
+
+# Kinds of the messages read by the flows, per exchange, see parse_message
+message_counters = defaultdict(Counter)
+
+# Subscription replies of okx, bitget and gateio
+ack_events = {"subscribe", "unsubscribe", "login", "error", "notice", "channel-conn-count"}
+
+
+def classify_message(response) -> str:
+    """
+        Classifies a decoded message by the top level keys of its data, before any parsing
+            ack : subscription replies and errors of the exchanges
+            heartbeat : pings, pongs, welcomes and empty payloads
+            malformed : not a message of the streams
+            data : anything else, left to the lookups
+    """
+    if not isinstance(response, dict) or "data" not in response:
+        return "malformed"
+    data = response["data"]
+    if isinstance(data, str):
+        return "heartbeat" if data.lower() in ("ping", "pong") else "malformed"
+    if not isinstance(data, dict):
+        return "data" if data is not None else "heartbeat"
+    if not data:
+        return "heartbeat"
+    if "ping" in data or "pong" in data or data.get("type") in ("welcome", "pong") or data.get("method") == "heartbeat":
+        return "heartbeat"
+    if data.get("event") in ack_events or data.get("type") == "ack" or data.get("error"):
+        return "ack"
+    # bybit, htx
+    if "ret_msg" in data or "subbed" in data or "unsubbed" in data:
+        return "ack"
+    # mexc, bingx
+    if "id" in data and "msg" in data and not data.get("data"):
+        return "ack"
+    # mexc, coinbase
+    channel = data.get("channel")
+    if channel == "subscriptions" or (isinstance(channel, str) and channel.startswith("rs.")):
+        return "heartbeat" if channel == "rs.pong" else "ack"
+    if channel == "heartbeats":
+        return "heartbeat"
+    # deribit subscriptions reply with the list of channels
+    if "jsonrpc" in data and isinstance(data.get("result"), list) and len(data["result"]) != 0 and isinstance(data["result"][0], str):
+        return "ack"
+    return "data"
+
+
+def parse_message(lookup : callable, response, *args, **kwargs):
+    """
+        Decodes and classifies the message, only data messages are parsed with lookup(response, *args, **kwargs)
+        The kind of every message is counted in message_counters[exchange],
+        data messages the lookup rejects or can not read (parse_errors) are counted as malformed, any other error is raised
+        returns: the output of the lookup or None
+    """
+    try:
+        response = decode_response(response)
+    except ValueError:
+        message_counters[None]["malformed"] += 1
+        return None
+    kind = classify_message(response)
+    output = None
+    if kind == "data":
+        try:
+            output = lookup(response, *args, **kwargs)
+        except parse_errors:
+            output = None
+        if output is None:
+            kind = "malformed"
+    message_counters[response.get("exchange") if isinstance(response, dict) else None][kind] += 1
+    return output
 
 
 
+# Contract units of every instrument, (kind, multiplier), see unit_conversion_kinds
 unit_conversion_btc = {
     # Any call related to the instrumet
-    "binance_perp_btcusd" : lambda value, btc_price: value * 100 / btc_price,  # https://www.binance.com/en/support/faq/binance-coin-margined-futures-contract-specifications-a4470430e3164c13932be8967961aede
+    "binance_perp_btcusd" : ("divide_by_price", 100),  # https://www.binance.com/en/support/faq/binance-coin-margined-futures-contract-specifications-a4470430e3164c13932be8967961aede
     # "binance_perp_btcusd" : lambda x : x         # base asset                # https://www.binance.com/en/support/faq/usd%E2%93%A2-margined-futures-contract-specifications-360033161972     
     # "bybit_perp_btcusdt" : "",                   # base asset                # https://www.bybit.com/en/announcement-info/contract-detail/
     # Used to fetch the first depth via API and for OI websocket
-    "bybit_perp_btcusd" :   lambda value, btc_price: value  / btc_price,       # https://www.bybit.com/data/basic/inverse/contract-detail?symbol=BTCUSD
+    "bybit_perp_btcusd" :   ("divide_by_price", 1),       # https://www.bybit.com/data/basic/inverse/contract-detail?symbol=BTCUSD
     # Only for open interest websocket
-    "bybit_perp_btcusdt" :   lambda value, btc_price: value  / btc_price,
+    "bybit_perp_btcusdt" :   ("divide_by_price", 1),
     # For perp depth api (since the exchange doesnt provide a well structured depth websockets)
-    "bingx_perp_btcusdt_depth" : lambda size: size / 10000,  # Not specified but was deduced from API #  https://bingx.com/en-us/tradeInfo/perpetual/contract-rules/BTC-USDT/
-    "bingx_perp_btcusdt_OI" : lambda openInterest, price : openInterest / price,    # Not specified, deduced from coinmarcetcap and coinglass
+    "bingx_perp_btcusdt_depth" : ("multiply", 0.0001),  # Not specified but was deduced from API #  https://bingx.com/en-us/tradeInfo/perpetual/contract-rules/BTC-USDT/
+    "bingx_perp_btcusdt_OI" : ("divide_by_price", 1),    # Not specified, deduced from coinmarcetcap and coinglass
     # bitget_btcusdt_perp is in btc units Deduced from coinmarcatcap and coinglass
-    "deribit_perp_btcusd" : lambda size, price : size / price,                  # https://docs.deribit.com/#user-mmp_trigger-index_name
+    "deribit_perp_btcusd" : ("divide_by_price", 1),                  # https://docs.deribit.com/#user-mmp_trigger-index_name
                                                                                # https://docs.deribit.com/#trades-instrument_name-interval
     # its seem the api call has some extra multiplier. Verified bt https://metrics.deribit.com/futures/BTC
-    "deribit_perp_btcusd_OI" : lambda size, price : size / price / 10,          # https://docs.deribit.com/#public-get_book_summary_by_instrument
+    "deribit_perp_btcusd_OI" : ("divide_by_price", 0.1),          # https://docs.deribit.com/#public-get_book_summary_by_instrument
     # Depth and trades of perp were called via api since by the time of coding the websocket was broken
     # No specification but deduced with coinmarketcap
-    "gateio_perp_btcusdt" : lambda size, price: size / price,     # https://www.gate.io/docs/developers/apiv4/en/#futures-order-book 
-    "htx_perp_btcusdt" : lambda size, price :  size * 100 / price,
+    "gateio_perp_btcusdt" : ("divide_by_price", 1),     # https://www.gate.io/docs/developers/apiv4/en/#futures-order-book 
+    "htx_perp_btcusdt" : ("divide_by_price", 100),
     # Deduced using coinmarketcap. Order book size is small for htx supporting the assumption that the total oi is small
-    "htx_perp_btcusdt_OI" : lambda size, price:  size  / price,   
+    "htx_perp_btcusdt_OI" : ("divide_by_price", 1),   
     # All option ois are in BTC units
-    "kucoin_perp_btcusdt" : lambda size : size / 1000,  # https://www.kucoin.com/futures/contract/detail/XBTUSDTM # confirmed by using kucoin trade station
+    "kucoin_perp_btcusdt" : ("multiply", 0.001),  # https://www.kucoin.com/futures/contract/detail/XBTUSDTM # confirmed by using kucoin trade station
     # NOT sure, using their contract specification is clear that coinmarcetcap has wrong numbers. Their API support has been trash
     # BUT I think its better to make it smaller rather than bigget.
     # This one is almost 4 times smaller than the one from coinmarketcap
-    "mexc_perp_btcusdt" : lambda size : size * 0.0001,     # https://futures.mexc.com/information/trading_rule
+    "mexc_perp_btcusdt" : ("multiply", 0.0001),     # https://futures.mexc.com/information/trading_rule
     # Applicable to trades and depth
-    "okx_perp_btcusd" : lambda size, price : size /price * 100    # https://www.okx.com/help/i-perpetual-swaps
+    "okx_perp_btcusd" : ("divide_by_price", 100)    # https://www.okx.com/help/i-perpetual-swaps
+}
+
+# Vectorized conversions, amount and price may be floats or arrays
+unit_conversion_kinds = {
+    "multiply" : lambda multiplier : lambda amount, price : amount * multiplier,
+    "divide_by_price" : lambda multiplier : lambda amount, price : amount * multiplier / price,
+}
+
+
+def unit_converter(spec) -> callable:
+    """
+        spec : (kind, multiplier) or a function of (amount) or (amount, price)
+        returns: converter(amount, price)
+    """
+    if not callable(spec):
+        kind, multiplier = spec
+        return unit_conversion_kinds[kind](multiplier)
+    try:
+        arguments = len(inspect.signature(spec).parameters)
+    except (TypeError, ValueError):
+        arguments = 2
+    if arguments == 1:
+        return lambda amount, price : spec(amount)
+    return spec
+
+
+# Trades payloads of every exchange, keyed by insType or by (insType, instrument), see extractors.tradesschema
+trades_schemas_btc = {
+    "binance" : {
+        "spot" : tradesschema(("data",), False, ("m", {True : "buy"}, "sell"), "p", "q", ("E",)),
+        "perpetual" : tradesschema(("data",), False, ("m", {True : "buy"}, "sell"), "p", "q", ("E",)),
+        ("perpetual", "btcusd") : tradesschema(("data",), False, ("m", {True : "buy"}, "sell"), "p", "q", ("E",), converter="binance_perp_btcusd"),
+    },
+    "bybit" : {
+        "spot" : tradesschema(("data", "data"), True, ("S", "lower"), "p", "v", ("T",)),
+        "perpetual" : tradesschema(("data", "data"), True, ("S", "lower"), "p", "v", ("T",)),
+    },
+    "coinbase" : {
+        "spot" : tradesschema(("data", "events", 0, "trades"), True, ("side", "lower"), "price", "size", ("time",), "iso"),
+    },
+    "okx" : {
+        "spot" : tradesschema(("data", "data"), True, ("side", None), "px", "sz", ("ts",)),
+        "perpetual" : tradesschema(("data", "data"), True, ("side", None), "px", "sz", ("ts",)),
+        ("perpetual", "btcusd") : tradesschema(("data", "data"), True, ("side", None), "px", "sz", ("ts",), converter="okx_perp_btcusd"),
+    },
+    "bingx" : {
+        "spot" : tradesschema(("data", "data"), False, ("m", {True : "sell"}, "buy"), "p", "q", ("T",)),
+        "perpetual" : tradesschema(("data", "data"), True, ("m", {True : "sell"}, "buy"), "p", "q", ("T",)),
+    },
+    "bitget" : {
+        "spot" : tradesschema(("data", "data"), True, ("side", None), "price", "size", ("ts",)),
+        "perpetual" : tradesschema(("data", "data"), True, ("side", None), "price", "size", ("ts",)),
+    },
+    "deribit" : {
+        "perpetual" : tradesschema(("data", "params", "data"), True, ("direction", None), "price", "amount", ("timestamp",), converter="deribit_perp_btcusd"),
+    },
+    "gateio" : {
+        "spot" : tradesschema(("data", "result"), False, ("side", None), "price", "amount", ("response", "data", "time_ms")),
+        "perpetual" : tradesschema(("data",), True, ("size", "sign"), "price", "size", ("create_time_ms",), converter="gateio_perp_btcusdt"),
+    },
+    "htx" : {
+        "spot" : tradesschema(("data", "tick", "data"), True, ("direction", None), "price", "amount", ("ts",), absolute=True),
+        "perpetual" : tradesschema(("data", "tick", "data"), True, ("direction", None), "price", "quantity", ("ts",), absolute=True, converter="htx_perp_btcusdt"),
+    },
+    "kucoin" : {
+        "spot" : tradesschema(("data", "data"), False, ("side", None), "price", "size", ("response", "timestamp"), "s"),
+        "perpetual" : tradesschema(("data", "data"), False, ("side", None), "price", "size", ("response", "timestamp"), "s", converter="kucoin_perp_btcusdt"),
+    },
+    "mexc" : {
+        "spot" : tradesschema(("data", "d", "deals"), True, ("S", {1 : "buy"}, "sell"), "p", "v", ("response", "data", "t")),
+        # Side of the perpetual deals is T, 1 buy 2 sell
+        "perpetual" : tradesschema(("data", "data"), False, ("T", {1 : "buy"}, "sell"), "p", "v", ("response", "data", "ts"), converter="mexc_perp_btcusdt"),
+    },
 }
 
+# snapshot : the message holds the whole book, flows replace the sides with it instead of updating them
+# checksum : checksum of the top of the book after the message as the exchange computes it, None if there is none
+depthupdate = namedtuple("depthupdate", ["bids", "asks", "timestamp", "snapshot", "checksum"], defaults=(False, None))
+tradescolumns = namedtuple("tradescolumns", ["side", "price", "amount", "timestamp"])
+optionside = namedtuple("optionside", ["strikes", "countdowns", "ois"])
+optionchain = namedtuple("optionchain", ["calls", "puts", "price", "timestamp"])
+tradesbatch = namedtuple("tradesbatch", ["side", "price", "amount", "timestamp", "offsets"])
+depthbatch = namedtuple("depthbatch", ["bids", "asks", "bids_offsets", "asks_offsets", "timestamp", "snapshot", "checksum"])
+
+
+def two_sided(lookup : callable) -> callable:
+    """
+        Decorator for depth lookups that decode the response once and return both sides
+            lookup(response) -> depthupdate(bids, asks, timestamp, snapshot, checksum)
+        Calling the decorated lookup with side ("bids", "asks") keeps the per-side contract
+            lookup(response, side) -> [[price, amount]...], timestamp
+        band : (low, high) prices, passed to the lookup, levels outside of it are skipped while parsing, see btc.format_books
+               lookups parse snapshots without it, as the book they replace may have moved out of the band
+        Flows check the two_sided attribute to know which contract the lookup follows
+    """
+    @functools.wraps(lookup)
+    def wrapper(self, response, side : str = None, band : tuple = None):
+        books = lookup(self, response, band)
+        if side is None or books is None:
+            return books
+        return (books.bids if side == "bids" else books.asks), books.timestamp
+    wrapper.two_sided = True
+    return wrapper
+
+
+def option_chain(lookup : callable) -> callable:
+    """
+        Decorator for option lookups that walk the chain once and return both sides
+            lookup(response) -> optionchain(optionside(strikes, countdowns, ois) of calls, ... of puts, price, timestamp)
+        Calling the decorated lookup with side ("C", "P") keeps the per-side contract
+            lookup(response, side) -> strikes, countdowns, ois, price, timestamp
+    """
+    @functools.wraps(lookup)
+    def wrapper(self, response, side : str = None):
+        chain = lookup(self, response)
+        if side is None or chain is None:
+            return chain
+        options = chain.calls if side == "C" else chain.puts
+        return options.strikes, options.countdowns, options.ois, chain.price, chain.timestamp
+    wrapper.two_sided = True
+    return wrapper
+
+
+def lookup_books(lookup : callable, response, band : tuple = None) -> depthupdate:
+    """
+        Both sides of a depth message with any depth lookup, two sided or per side
+        band : (low, high) prices to keep, only two sided lookups skip the levels outside of it
+    """
+    if getattr(lookup, "two_sided", False):
+        return lookup(response, band=band)
+    bids, timestamp = lookup(response, "bids")
+    asks, timestamp = lookup(response, "asks")
+    return depthupdate(bids, asks, timestamp)
+
+
+def parse_trades_batch(lookup : callable, messages) -> tradesbatch:
+    """
+        Parses a burst of messages with a trades or liquidations lookup into one columnar batch
+            side, price, amount, timestamp : arrays over all rows
+            offsets : rows of the i-th parsed message are [offsets[i], offsets[i+1])
+        Messages the lookup rejects are left out
+    """
+    rows = []
+    counts = [0]
+    for message in messages:
+        trades = parse_message(lookup, message)
+        if trades is None:
+            continue
+        if isinstance(trades, tuple):
+            trades = list(zip(*[column.tolist() for column in trades]))
+        rows.extend(trades)
+        counts.append(len(trades))
+    side, price, amount, timestamp = zip(*rows) if len(rows) != 0 else ((), (), (), ())
+    return tradesbatch(np.array(side, dtype=str), np.array(price, dtype=np.float64), np.array(amount, dtype=np.float64),
+                       np.array(timestamp, dtype=np.int64), np.cumsum(counts))
+
+parse_liquidations_batch = parse_trades_batch
+
+
+def parse_depth_batch(lookup : callable, messages) -> depthbatch:
+    """
+        Parses a burst of messages with a depth lookup into one columnar batch
+            bids, asks : float64 arrays of shape (N, 2) over all messages
+            bids_offsets, asks_offsets : levels of the i-th parsed message are [offsets[i], offsets[i+1])
+            timestamp : timestamp of every parsed message
+            snapshot : whether every parsed message is a snapshot of the book
+            checksum : [checksum or None...] of every parsed message
+        Messages the lookup rejects are left out
+    """
+    bids, asks, timestamps, snapshots, checksums = [], [], [], [], []
+    bids_counts, asks_counts = [0], [0]
+    books_lookup = functools.partial(lookup_books, lookup)
+    for message in messages:
+        books = parse_message(books_lookup, message)
+        if books is None:
+            continue
+        bids.append(np.asarray(books.bids, dtype=np.float64).reshape(-1, 2))
+        asks.append(np.asarray(books.asks, dtype=np.float64).reshape(-1, 2))
+        bids_counts.append(len(bids[-1]))
+        asks_counts.append(len(asks[-1]))
+        timestamps.append(books.timestamp)
+        snapshots.append(books.snapshot)
+        checksums.append(books.checksum)
+    empty = [np.empty((0, 2), dtype=np.float64)]
+    return depthbatch(np.concatenate(bids + empty), np.concatenate(asks + empty), np.cumsum(bids_counts), np.cumsum(asks_counts),
+                      np.array(timestamps, dtype=np.int64), np.array(snapshots, dtype=bool), checksums)
+
+
+class extractors(dict):
+    """
+        Compiled extractors keyed by insType or (insType, instrument), read with (insType, instrument) keys
+        An instrument without its own extractor falls back to the one of its insType, the fallback is remembered
+    """
+    def __missing__(self, key):
+        if not isinstance(key, tuple):
+            raise KeyError(key)
+        self[key] = self[key[0]]
+        return self[key]
+
+
 class btc():
 
-    def __init__(self, unit_conversion_dict : dict):
+    def __init__(self, unit_conversion_dict : dict, as_arrays : bool = False, trades_schemas : dict = trades_schemas_btc):
 
         """
-            unit_conversion_dict must contain a dictionary with functions to transform contracts units into btc units if necessary
+            unit_conversion_dict must contain a dictionary with the contract units of every instrument, (kind, multiplier) or a function,
+                                 to transform contracts units into btc units if necessary. Converters are resolved once here
+            as_arrays : if True, depth lookups return float64 arrays of shape (N, 2) per side
+                        and trades lookups return tradescolumns(side, price, amount, timestamp) of numpy arrays
+                        Unit conversion is applied once to the whole amount column
+            trades_schemas : payloads of the trades of every exchange, compiled once here
+                             into one lookup per exchange with the unit conversions inlined, for lists,
+                             and into extractors of unconverted rows per schema, for arrays
         """
         self.unit_conversion_dict = unit_conversion_dict
+        self.converters = {name : unit_converter(spec) for name, spec in unit_conversion_dict.items()}
+        self.as_arrays = as_arrays
+        self.trades_lookups = {exchange : compile_trades_lookup({key : (schema, self.trades_conversion(schema)) for key, schema in schemas.items()},
+                                                                json_loads, parse_errors)
+                               for exchange, schemas in trades_schemas.items()}
+        self.trades_extractors = {exchange : extractors({key : (compile_trades_extractor(schema), self.trades_converter(schema)) for key, schema in schemas.items()})
+                                  for exchange, schemas in trades_schemas.items()}
+
+    def trades_conversion(self, schema : tradesschema):
+        """
+            returns: (kind, multiplier) of the registry to inline, the converter of a function spec or None
+        """
+        if schema.converter is None:
+            return None
+        conversion = self.unit_conversion_dict[schema.converter]
+        return self.converters[schema.converter] if callable(conversion) else conversion
+
+    def trades_converter(self, schema : tradesschema) -> callable:
+        """
+            returns: vectorized converter of the amount column for array lookups or None
+        """
+        return None if schema.converter is None else self.converters[schema.converter]
+
+    def extract_trades(self, exchange : str, response):
+        """
+            Trades of the response with the compiled lookup of the exchange,
+            or with the extractor of the insType and instrument and the vectorized converter if as_arrays
+            The *_trades_lookup methods call the compiled lookups directly for lists
+            returns: [[side, price, amount, timestamp]...] or tradescolumns of np.ndarrays if as_arrays
+        """
+        if not self.as_arrays:
+            return self.trades_lookups[exchange](response)
+        response = decode_response(response)
+        try:
+            rows, convert = self.trades_extractors[exchange][response["insType"], response["instrument"]]
+            return self.format_trades(rows(response), convert)
+        except parse_errors:
+            return None
+
+    def format_books(self, levels : list, convert : callable = None, *args, columns : tuple = (0, 1), band : tuple = None):
+        """
+            levels : rows of a side of the book, columns are the keys of price and amount in a row
+            convert : unit conversion of the amount, called as convert(amount, *args)
+            returns: [[price, amount]...] or np.ndarray of shape (N, 2) if as_arrays
+            band : (low, high) prices, levels outside of it are skipped before the amounts are parsed and converted
+        """
+        p, a = columns
+        if not self.as_arrays:
+            if band is not None:
+                low, high = band
+                if convert is None:
+                    return [[price, float(x[a])] for x in levels if low <= (price := float(x[p])) <= high]
+                return [[price, convert(float(x[a]), *args)] for x in levels if low <= (price := float(x[p])) <= high]
+            if convert is None:
+                return [[float(x[p]), float(x[a])] for x in levels]
+            return [[float(x[p]), convert(float(x[a]), *args)] for x in levels]
+        if len(levels) == 0:
+            return np.empty((0, 2), dtype=np.float64)
+        if columns == (0, 1):
+            books = np.array([x[:2] for x in levels], dtype=np.float64)
+        else:
+            books = np.array([(x[p], x[a]) for x in levels], dtype=np.float64)
+        if band is not None:
+            low, high = band
+            books = books[(books[:, 0] >= low) & (books[:, 0] <= high)]
+        if convert is not None:
+            books[:, 1] = convert(books[:, 1], *args)
+        return books
+
+    def format_option_chain(self, rows, exchange : str, price : float, timestamp : int) -> optionchain:
+        """
+            rows : (symbol, oi) of every instrument of the chain
+            Splits calls and puts in a single pass, countdowns are evaluated once for both sides
+        """
+        sides = {"C" : ([], [], []), "P" : ([], [], [])}
+        for symbol, oi in rows:
+            instrument = option_instrument(symbol, exchange)
+            strikes, expiries, ois = sides[instrument.side]
+            strikes.append(instrument.strike)
+            expiries.append(instrument.expiry)
+            ois.append(float(oi))
+        now = datetime.datetime.now()
+        calls, puts = [optionside(np.array(strikes, dtype=np.float64), option_countdowns(expiries, exchange, now), np.array(ois, dtype=np.float64))
+                       for strikes, expiries, ois in (sides["C"], sides["P"])]
+        return optionchain(calls, puts, price, timestamp)
+
+    def format_trades(self, trades : list, convert : callable = None):
+        """
+            trades : [[side, price, amount, timestamp]...]
+            convert : unit conversion of the amount, called as convert(amount, price)
+            returns: [[side, price, amount, timestamp]...] or tradescolumns of np.ndarrays if as_arrays
+        """
+        if not self.as_arrays:
+            if convert is None:
+                return trades
+            return [[side, price, convert(amount, price), timestamp] for side, price, amount, timestamp in trades]
+        side, price, amount, timestamp = zip(*trades) if len(trades) != 0 else ((), (), (), ())
+        price = np.array(price, dtype=np.float64)
+        amount = np.array(amount, dtype=np.float64)
+        if convert is not None:
+            amount = convert(amount, price)
+        return tradescolumns(np.array(side), price, amount, np.array(timestamp))
 
     ### BINANCE ###
 
     def binance_liquidations_lookup(self, response : json) -> list:
         """
-            [[side, price, amount timestamp]]   str, float, float, str
+            [[side, price, amount timestamp]]   str, float, float, int
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         instrument = response["instrument"]
         try:
@@ -65,149 +479,116 @@ class btc():
             side = response.get("data").get("o").get("S").lower()
             price = float(response.get("data").get("o").get("p"))
             timestamp = response.get("data").get("o").get("T")
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
             if instrument == "btcusd":
-                amount = self.unit_conversion_dict.get("binance_perp_btcusd")(amount, price)
+                amount = self.converters["binance_perp_btcusd"](amount, price)
             l.append([side, price, amount, timestamp])
             return l
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
-    def binance_funding_lookup(self, response : json) -> Tuple[float, float, str]:
+    def binance_funding_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             funding, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             funding = float(response.get("data")[0].get("fundingRate"))
             timestamp = response.get("data")[0].get("fundingTime")
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
             return funding, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
-    def binance_OI_lookup(self, response : json) -> Tuple[float, float, str]:
+    def binance_OI_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             oi, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         instrument = response["instrument"]
         price = response.get("btc_price")
         try:
             openInterest = float(response.get("data").get("openInterest"))
             timestamp = response.get("data").get("time")
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
             if instrument == "btcusd":
-                openInterest = self.unit_conversion_dict.get("binance_perp_btcusd")(openInterest, price)
+                openInterest = self.converters["binance_perp_btcusd"](openInterest, price)
             return openInterest, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
-    def binance_GTA_TTA_TTP_lookup(self, response : json) -> Tuple[float, float, float, str]:
+    def binance_GTA_TTA_TTP_lookup(self, response : json) -> Tuple[float, float, float, int]:
         """
             longAccoumt, shortAccount, longShortration, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = response["btc_price"]
         try:
             longAccount = float(response.get("data")[0].get("longAccount"))
             shortAccount = float(response.get("data")[0].get("shortAccount"))
             longShortRation = float(response.get("data")[0].get("longShortRatio"))
             timestamp = response.get("data")[0].get("timestamp")
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
             return longAccount, shortAccount, longShortRation, price, timestamp
-        except:
+        except parse_errors:
             try: 
                 longAccount = float(response.get("data")[0].get("longPosition"))
                 shortAccount = float(response.get("data")[0].get("shortPosition"))
                 longShortRation = float(response.get("data")[0].get("longShortRatio"))
                 timestamp = response.get("data")[0].get("timestamp")
-                timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
+                timestamp = int(timestamp)
                 return longAccount, shortAccount, longShortRation, price, timestamp
-            except:
-                timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+            except parse_errors:
                 return None
 
 
-    def binance_trades_lookup(self, response : json) -> list:
+    def binance_trades_lookup(self, response) -> list:
         """
-            [side, price, amount, timestamp]
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        instrument = response["instrument"]
-        insType = response["insType"]
-        price = response.get("btc_price")
-        try:
-            quantity = float(response.get("data").get("q"))
-            price = float(response.get("data").get("p"))
-            if response.get("data").get("m") == True:
-                side = "buy"
-            else:
-                side = "sell"
-            timestamp = response.get("data").get("E")
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-            if insType == "perpetual" and instrument == "btcusd":
-                quantity = self.unit_conversion_dict.get("binance_perp_btcusd")(quantity, price)
-            return [[side, price, quantity, timestamp]]
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-            return None
+        if self.as_arrays:
+            return self.extract_trades("binance", response)
+        return self.trades_lookups["binance"](response)
 
 
-    def binance_depth_lookup(self, response : json, side : str) -> Tuple[list, str]:
+    @two_sided
+    def binance_depth_lookup(self, response : json, band : tuple = None) -> depthupdate:
         """
-            side : bids, asks
-            Must return a list of float and timestamp in string format
+            Decodes the response once and returns both sides
             [
                 [float(price), float(amount)],
                 .....
             ]
-            returns: [[price, amount]...], timestamp
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        side = "bid" if side == "bids" else "ask"
-        response = json.loads(response)
+        response = decode_response(response)
         instrument = response["instrument"]
         insType = response["insType"]
         price = response["btc_price"]
-        timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        timestamp = int(response["timestamp"] * 1000)
         try:
-            if side == "ask":
-                for key in ["a", "asks"]:
-                    books = response["data"].get(key, np.nan)
-                    if books is np.nan:
-                        continue
-                    else:
-                        break
-
-            if side == "bid":
-                for key in ["b", "bids"]:
-                    books = response["data"].get(key, np.nan)
-                    if books is np.nan:
-                        continue
-                    else:
-                        break
-
-            if response["data"].get("E", np.nan) != np.nan:
-                try:
-                    timestamp = datetime.datetime.fromtimestamp(float(response["data"].get("E")/ 10**3)).strftime('%Y-%m-%d %H:%M:%S')
-                except:
-                    pass
-            
-            books = [[float(x[0]), float(x[1])] for x in books]
+            data = response["data"]
+            # The API snapshot has bids and asks, the diffs of the stream b and a
+            snapshot = "b" not in data
+            band = None if snapshot else band
+            bids = data["b"] if "b" in data else data["bids"]
+            asks = data["a"] if "a" in data else data["asks"]
+
+            if data.get("E") is not None:
+                timestamp = int(data.get("E"))
 
+            convert = None
             if insType == "perpetual" and instrument == "btcusd":
-                books = [[x[0], self.unit_conversion_dict.get("binance_perp_btcusd")(x[1], price)] for x in books]  
-            
-            return books, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+                convert = self.converters["binance_perp_btcusd"]
+            bids = self.format_books(bids, convert, price, band=band)
+            asks = self.format_books(asks, convert, price, band=band)
+
+            return depthupdate(bids, asks, timestamp, snapshot)
+        except parse_errors:
             return None
 
 
@@ -215,71 +596,72 @@ class btc():
 
     ### Bybit ###
 
-    def bybit_GTA_lookup(self, response : json) -> Tuple[float, float, float, str]:
+    def bybit_GTA_lookup(self, response : json) -> Tuple[float, float, float, int]:
         """
             buyRation, sellRation, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = response["btc_price"]
         try:
             buyRation = float(response.get("data").get("result").get("list")[0].get("buyRatio"))
             sellRation = float(response.get("data").get("result").get("list")[0].get("sellRatio"))
             timestamp = int(response.get("data").get("result").get("list")[0].get("timestamp"))
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
             return buyRation, sellRation, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
 
-    def bybit_depth_lookup(self, response : json, side : str) -> Tuple[list, str]:
+    @two_sided
+    def bybit_depth_lookup(self, response : json, band : tuple = None) -> depthupdate:
         """ 
-            side : "bids" for books
-                "asks" for asks
-                returns: [[price, amount]...], timestamp
+            Decodes the response once and returns both sides
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        side = "a" if side == "asks" else "b"
-        response = json.loads(response)
+        response = decode_response(response)
         instrument = response.get("instrument")
         insType = response.get("insType")
         price = response.get("btc_price")
         try:
             try:
                 books = response["data"]["data"]
-            except:
+            except parse_errors:
                 books = response["data"]["result"]
-            books = books.get(side)
             try:
                 timestamp = float(response.get("data").get("ts"))
-            except:
+            except parse_errors:
                 timestamp = float(response.get("data").get("result").get("ts"))
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
+            # API result or the snapshot message of the stream
+            snapshot = "result" in response["data"] or response["data"].get("type") == "snapshot"
+            band = None if snapshot else band
             if insType == "perpetual" and instrument == "btcusd" and response.get("data").get("topic") != "orderbook.200.BTCPERP":
-                books = [[float(x[0]), self.unit_conversion_dict.get("bybit_perp_btcusd")(float(x[1]), price)] for x in books]
+                convert = self.converters["bybit_perp_btcusd"]
+                bids = self.format_books(books.get("b"), convert, price, band=band)
+                asks = self.format_books(books.get("a"), convert, price, band=band)
             else:
-                books = [[float(x[0]), float(x[1])] for x in books]
-            return books, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+                bids = self.format_books(books.get("b"), band=band)
+                asks = self.format_books(books.get("a"), band=band)
+            return depthupdate(bids, asks, timestamp, snapshot)
+        except parse_errors:
             return None
 
 
-    def bybit_OI_funding_lookup(self, response : json) -> Tuple[float, float, float, str]:
+    def bybit_OI_funding_lookup(self, response : json) -> Tuple[float, float, float, int]:
         """
             fundingRatem OI price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = response["btc_price"]
         try:
             funding = float(response.get("data").get("data").get("fundingRate"))
             timestamp = float(response.get("data").get("ts"))
             openInterestValue = float(response.get("data").get("data").get("openInterestValue"))
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-            openInterestValue = self.unit_conversion_dict.get("bybit_perp_btcusdt")(openInterestValue, price)
+            timestamp = int(timestamp)
+            openInterestValue = self.converters["bybit_perp_btcusdt"](openInterestValue, price)
             return funding, openInterestValue, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
@@ -287,7 +669,7 @@ class btc():
         """
             [[side, price, size, timestamp]]
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = response["btc_price"]
         try:
             l = []
@@ -295,54 +677,37 @@ class btc():
             price = float(response.get("data").get("data").get("price", np.nan))
             size = float(response.get("data").get("data").get("size", np.nan))
             timestamp = response.get("data").get("data").get("updatedTime", np.nan)
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
             l.append([side, price, size, timestamp])
             return l
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
 
-    def bybit_trades_lookup(self, response : json) -> list:
+    def bybit_trades_lookup(self, response) -> list:
         """
-            [[side, price, size, timestamp]]
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        price = response["btc_price"]
-        try:
-            l = []
-            for trade in response.get("data").get("data"):
-                side = trade.get("S").lower()
-                price = float(trade.get("p"))
-                size = float(trade.get("v"))
-                timestamp = trade.get("T")
-                timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                l.append([side, price, size, timestamp])
-            return l
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-            return None
+        if self.as_arrays:
+            return self.extract_trades("bybit", response)
+        return self.trades_lookups["bybit"](response)
 
 
-    def bybit_option_oi_lookup(self, response : json, side : str) -> Tuple[np.array, np.array, np.array, float, str]:
+    @option_chain
+    def bybit_option_oi_lookup(self, response : json) -> optionchain:
         """
-            side : P, C
-            returns: strikes, countdowns, ois, price, timestamp
+            Walks the chain once and returns both sides
+            returns: optionchain(calls, puts, price, timestamp), sides are optionside(strikes, countdowns, ois)
         """
 
-        r = json.loads(response)
+        r = decode_response(response)
         price = r["btc_price"]
         try:
-            strikes = np.array([float(d.get("symbol").split("-")[-2]) for d in r.get("data").get("result").get("list") if d.get("symbol").split("-")[-1] == side])
-            ois = np.array([float(d.get("openInterest")) for d in r.get("data").get("result").get("list") if d.get("symbol").split("-")[-1] == side])
-            countdowns = np.array([calculate_option_time_to_expire_bybit(d.get("symbol").split("-")[1]) for d in r.get("data").get("result").get("list") if d.get("symbol").split("-")[-1] == side])
-            
-            timestamp = datetime.datetime.fromtimestamp(r.get("data").get("time") / 10**3).strftime('%Y-%m-%d %H:%M:%S')
-            
-            return strikes, countdowns, ois, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(r["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(r.get("data").get("time"))
+            rows = ((d.get("symbol"), d.get("openInterest")) for d in r.get("data").get("result").get("list"))
+            return self.format_option_chain(rows, "bybit", price, timestamp)
+        except parse_errors:
             return None
 
 
@@ -350,89 +715,74 @@ class btc():
 
     ### COINBASE ###
 
-    def coinbase_depth_lookup(self, response, side) -> Tuple[list, str]:
+    @two_sided
+    def coinbase_depth_lookup(self, response, band : tuple = None) -> depthupdate:
         """
-            side : asks, bids
-            returns: returns: [[price, amount]...], timestamp
+            Decodes the response once and returns both sides
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        side = "offer" if side == "asks" else "bid"
+        response = decode_response(response)
+        data = response.get("data")
+
+        # API snapshot
+        if data.get("pricebook", None) != None:
+            bids = self.format_books(data.get("pricebook").get("bids"), columns=("price", "size"))
+            asks = self.format_books(data.get("pricebook").get("asks"), columns=("price", "size"))
+            timestamp = iso8601_to_timestamp(data.get("pricebook").get("time"))
+            return depthupdate(bids, asks, timestamp, True)
+
+        try:
+            event = data.get("events")[0]
+        except parse_errors:
+            return None
 
-        response = json.loads(response)
         # The first response may be a subscription info
-        if response.get("data").get("events", np.nan) != np.nan:
-            try: 
-                if response.get("data").get("events")[0].get("subscriptions", None) != None:  
-                    return None
-            except:
-                pass
+        if event.get("subscriptions", None) != None:
+            return None
 
         # Websockets stream
-        if response.get("data").get("events", np.nan) != np.nan:
+        if event.get("updates", None) != None:
             try:
-                if response.get("data").get("events")[0].get("updates", None) != None:
-                    books = response.get("data").get("events")[0].get("updates")
-                    formated_books = []
-                    for book in books:
-                        if book.get("side") == side:
-                            formated_books.append([float(book.get("price_level")), float(book.get("new_quantity"))])
-                    timestamp = parser.parse(response.get("data").get("events")[0].get("updates")[0].get("event_time")).strftime('%Y-%m-%d %H:%M:%S')
-            except:
-                pass
-
-        # API snapshot
-        if response.get("data").get("pricebook", None) != None:
-            if side == "bid":
-                side = "bids"
-            if side == "offer":
-                side = "asks"
-            books = response.get("data").get("pricebook").get(side)
-            formated_books = []
-            for book in books:
-                formated_books.append([float(book.get("price")), float(book.get("size"))])
-            timestamp = parser.parse(response.get("data").get("pricebook").get("time")).strftime('%Y-%m-%d %H:%M:%S')
-        
-        return formated_books, timestamp
+                bids = []
+                asks = []
+                for book in event.get("updates"):
+                    if book.get("side") == "bid":
+                        bids.append(book)
+                    if book.get("side") == "offer":
+                        asks.append(book)
+                bids = self.format_books(bids, columns=("price_level", "new_quantity"), band=band)
+                asks = self.format_books(asks, columns=("price_level", "new_quantity"), band=band)
+                timestamp = iso8601_to_timestamp(event.get("updates")[0].get("event_time"))
+                return depthupdate(bids, asks, timestamp)
+            except parse_errors:
+                return None
 
 
 
-    def coinbase_trades_lookup(self, response : dict) -> list:
+    def coinbase_trades_lookup(self, response) -> list:
         """
-            [side, price, size, timestamp]
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        try:
-            l = []
-            trades = response.get("data").get("events")[0].get("trades")
-            for trade in trades:
-                side = trade.get("side").lower()
-                price = float(trade.get("price"))
-                size = float(trade.get("size"))
-                timestamp = parser.parse(trade.get("time")).strftime('%Y-%m-%d %H:%M:%S')
-                l.append([side, price, size, timestamp])
-            return l
-        except:
-            timestamp = parser.parse(response.get("data").get("timestamp")).strftime('%Y-%m-%d %H:%M:%S')
-            return None
+        if self.as_arrays:
+            return self.extract_trades("coinbase", response)
+        return self.trades_lookups["coinbase"](response)
 
 
     ## OKX ###
 
-    def okx_option_oi_lookup(self, response : dict, side : str) -> Tuple[np.array, np.array, np.array, float, str]:
+    @option_chain
+    def okx_option_oi_lookup(self, response : dict) -> optionchain:
         """
-            side : P, C
-            returns : strikes, countdowns, ois, price, timestamp
+            Walks the chain once and returns both sides
+            returns : optionchain(calls, puts, price, timestamp), sides are optionside(strikes, countdowns, ois)
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = response["btc_price"]
         try:
-            strikes = np.array([float(x["instId"].split('-')[-2]) for x in response["data"]["data"] if x["instId"].split('-')[-1] == side])
-            countdowns = np.array([calculate_option_time_to_expire_okex(x["instId"].split('-')[2]) for x in response["data"]["data"] if x["instId"].split('-')[-1] == side])
-            ois = np.array([float(x["oiCcy"]) for x in response["data"]["data"] if x["instId"].split('-')[-1] == side])
-            timestamp = int(response.get("data").get("data")[0].get("ts")) / 1000
-            timestamp = arrow.get(timestamp).format('YYYY-MM-DD HH:mm:ss')
-            return strikes, countdowns, ois, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(r["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(response.get("data").get("data")[0].get("ts"))
+            rows = ((x["instId"], x["oiCcy"]) for x in response["data"]["data"])
+            return self.format_option_chain(rows, "okx", price, timestamp)
+        except parse_errors:
             return None
 
 
@@ -440,85 +790,73 @@ class btc():
 
 
 
-    def okx_GTA_lookup(self, response : dict) -> Tuple[float, float, str]:
+    def okx_GTA_lookup(self, response : dict) -> Tuple[float, float, int]:
         """
             ratio, pricem, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = response["btc_price"]
         try:
             ratio = float(response.get("data").get("data")[0][1])
-            timestamp = int(response.get("data").get("data")[0][0]) / 1000
-            timestamp = arrow.get(timestamp).format('YYYY-MM-DD HH:mm:ss')
+            timestamp = int(response.get("data").get("data")[0][0])
             return ratio, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
 
 
-    def okx_depth_lookup(self, response : dict, side : str) -> Tuple[list, str]:
+    @two_sided
+    def okx_depth_lookup(self, response : dict, band : tuple = None) -> depthupdate:
         """
-            side : asks, bids
-            returns: returns: [[price, amount]...], timestamp
+            Decodes the response once and returns both sides
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        response = json.loads(response)
+        response = decode_response(response)
         instrument = response["instrument"]
         insType = response["insType"]
         price = response["btc_price"]
         try:
-            books = response.get("data").get("data")[0][side]
-            formated_books = [[float(x[0]), float(x[1])] for x in books]
-            timestamp = arrow.get(int(response.get("data").get("data")[0]["ts"]) / 1000).format('YYYY-MM-DD HH:mm:ss')
+            books = response.get("data").get("data")[0]
+            snapshot = response.get("data").get("action") == "snapshot"
+            band = None if snapshot else band
+            convert = None
             if instrument == "btcusd" and insType == "perpetual":
-                formated_books = [ [x[0], self.unit_conversion_dict.get("okx_perp_btcusd")(x[1], price)]  for x in formated_books]
-            return formated_books, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+                convert = self.converters["okx_perp_btcusd"]
+            bids = self.format_books(books["bids"], convert, price, band=band)
+            asks = self.format_books(books["asks"], convert, price, band=band)
+            timestamp = int(books["ts"])
+            # The checksum is over the amounts of the exchange, it can not be verified on converted books
+            checksum = books.get("checksum") if convert is None else None
+            return depthupdate(bids, asks, timestamp, snapshot, checksum)
+        except parse_errors:
             return None
 
 
 
 
-    def okx_trades_lookup(self, response : dict) -> list:
+    def okx_trades_lookup(self, response) -> list:
         """
-            [[side, price, amount, timestamp]]
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        instrument = response["instrument"]
-        insType = response["insType"]
-        price = response["btc_price"]
-        try:
-            l = []
-            for trade in response.get("data").get("data"):
-                side = trade.get("side")
-                price = float(trade.get("px"))
-                amount = float(trade.get("sz"))
-                timestamp = arrow.get(int(trade["ts"]) / 1000).format('YYYY-MM-DD HH:mm:ss')
-                if instrument in ["btcusd"] and insType == "perpetual":
-                    self.unit_conversion_dict.get("okx_perp_btcusd")(amount, price)
-                l.append([side, price, amount, timestamp])
-            return l
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-            return None
+        if self.as_arrays:
+            return self.extract_trades("okx", response)
+        return self.trades_lookups["okx"](response)
 
 
 
 
-    def okx_funding_lookup(self, response : dict) -> Tuple[float, float, str]:
+    def okx_funding_lookup(self, response : dict) -> Tuple[float, float, int]:
         """
             rate, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = response["btc_price"]
         try:
             rate = float(response.get("data").get("data")[0].get("fundingRate"))
-            timestamp = datetime.datetime.fromtimestamp(float(response.get("data").get("data")[0].get("ts")) / 10**3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(float(response.get("data").get("data")[0].get("ts")))
             return rate, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
@@ -526,7 +864,7 @@ class btc():
         """
             [[side, price, amount, timestamp], ....]
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = response["btc_price"]
         try:
             l = []
@@ -539,52 +877,49 @@ class btc():
                         amount = float(detail.get("sz"))
                         if ticker in ["BTC-USD-SWAP", "BTC-USDT-SWAP"]:
                             if ticker == "BTC-USD-SWAP":
-                                amount = self.unit_conversion_dict.get("okx_perp_btcusd")(amount, price)
+                                amount = self.converters["okx_perp_btcusd"](amount, price)
                             if ticker == "BTC-USDT-SWAP":
                                 pass
                         else:
                             return None
                         timestamp = detail.get("ts")
-                        timestamp = datetime.datetime.fromtimestamp(float(timestamp) / 10**3).strftime('%Y-%m-%d %H:%M:%S')
+                        timestamp = int(float(timestamp))
                         l.append([side, price, amount, timestamp])
             return l
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
-    def okx_OI_lookup(self, response : json) -> Tuple[float, float, str]:
-        response = json.loads(response)
+    def okx_OI_lookup(self, response : json) -> Tuple[float, float, int]:
+        response = decode_response(response)
         instrument = response["instrument"]
         insType = response["insType"]
         price = response["btc_price"]
         try:
             oi = float(response.get("data").get("data")[0].get("oiCcy"))
             timestamp = float(response.get("data").get("data")[0].get("ts"))
-            timestamp = datetime.datetime.fromtimestamp(float(timestamp) / 10**3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(float(timestamp))
             return oi, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
 ## DERIBIT ###
 
 
-    def deribit_option_oi_lookup(self, response : dict, side : str) -> Tuple[np.array, np.array, np.array, float, str]:
+    @option_chain
+    def deribit_option_oi_lookup(self, response : dict) -> optionchain:
         """
-            side : P, C
+            Walks the chain once and returns both sides
+            returns: optionchain(calls, puts, price, timestamp), sides are optionside(strikes, countdowns, ois)
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = response["btc_price"]
         try:
-            strikes = np.array([float(x["instrument_name"].split('-')[-2]) for x in response["data"]["result"] if x["instrument_name"].split('-')[-1] == side])
-            countdowns = np.array([calculate_option_time_to_expire_deribit(x["instrument_name"].split('-')[1]) for x in response["data"]["result"] if x["instrument_name"].split('-')[-1] == side])
-            ois = np.array([float(x["open_interest"]) for x in response["data"]["result"] if x["instrument_name"].split('-')[-1] == side])
             timestamp = response.get("data").get("usOut")
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**6).strftime('%Y-%m-%d %H:%M:%S')
-            return strikes, countdowns, ois, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp) // 10**3
+            rows = ((x["instrument_name"], x["open_interest"]) for x in response["data"]["result"])
+            return self.format_option_chain(rows, "deribit", price, timestamp)
+        except parse_errors:
             return None
 
 
@@ -592,7 +927,7 @@ class btc():
     # CRYPTO PANIC #
 
     def lookup_news(self, data):
-        data = json.loads(data)
+        data = decode_response(data)
         try:
             results = data.get("data").get("results")
             timestamp = results[0].get("published_at")
@@ -600,432 +935,306 @@ class btc():
             input_datetime = datetime.datetime.strptime(timestamp, '%Y-%m-%dT%H:%M:%SZ')
             formatted_datetime = input_datetime.strftime('%Y-%m-%d %H:%M:%S')
             return news, formatted_datetime
-        except:
+        except parse_errors:
             return None
         
 
     # Bingx
         
-    def bingx_depth_lookup(self, response : json, side : str) -> Tuple[list, str]:
+    @two_sided
+    def bingx_depth_lookup(self, response : json, band : tuple = None) -> depthupdate:
         """
-            side : bids, asks
-            Must return a list of float and timestamp in string format
+            Decodes the response once and returns both sides
             [
                 [float(price), float(amount)],
                 .....
             ]
-            returns: [[price, amount]...], timestamp
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        side = "bid" if side == "bids" else "ask"
-        response = json.loads(response)
+        response = decode_response(response)
         instrument = response["instrument"]
         insType = response["insType"]
         price = response["btc_price"]
-        timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        timestamp = int(response["timestamp"] * 1000)
+        snapshot = False
         try:
             if insType == "spot":
-                if side == "ask":
-                    for key in ["a", "asks"]:
-                        books = response["data"].get("data").get(key, np.nan)
-                        if books is np.nan:
-                            continue
-                        else:
-                            break
+                data = response["data"].get("data")
+                snapshot = "b" not in data
+                band = None if snapshot else band
+                bids = data["b"] if "b" in data else data["bids"]
+                asks = data["a"] if "a" in data else data["asks"]
 
-                if side == "bid":
-                    for key in ["b", "bids"]:
-                        books = response["data"].get("data").get(key, np.nan)
-                        if books is np.nan:
-                            continue
-                        else:
-                            break
+                if response["data"].get("E") is not None:
+                    timestamp = int(response["data"].get("E"))
 
-                if response["data"].get("E", np.nan) != np.nan:
-                    try:
-                        timestamp = datetime.datetime.fromtimestamp(float(response["data"].get("E")/ 10**3)).strftime('%Y-%m-%d %H:%M:%S')
-                    except:
-                        pass
-                
-                books = [[float(x[0]), float(x[1])] for x in books]
+                bids = self.format_books(bids, band=band)
+                asks = self.format_books(asks, band=band)
 
             if insType == "perpetual" and instrument == "btcusdt":
-                books = response["data"].get("data").get("".join([side, "Coin"]))
-                books = [[float(x[0]), float(x[1])] for x in books]
-                timestamp = datetime.datetime.fromtimestamp(float(response["data"].get("T")/ 10**3)).strftime('%Y-%m-%d %H:%M:%S')
-            return books, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+                books = response["data"]["data"]
+                bids = self.format_books(books.get("bidsCoin"))
+                asks = self.format_books(books.get("asksCoin"))
+                timestamp = int(books["T"])
+                # API book
+                snapshot = True
+            return depthupdate(bids, asks, timestamp, snapshot)
+        except parse_errors:
             return None
     
 
-    def bingx_funding_lookup(self, response : json) -> Tuple[float, float, str]:
+    def bingx_funding_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             funding, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             funding = float(response.get("data").get("data").get("lastFundingRate"))
             timestamp = response.get("timestamp")
-            timestamp = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(float(timestamp) * 1000)
             return funding, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
     
-    def bingx_OI_lookup(self, response : json) -> Tuple[float, float, str]:
+    def bingx_OI_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             oi, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         instrument = response["instrument"]
         price = response.get("btc_price")
         try:
             openInterest = float(response.get("data").get("data").get("openInterest"))
             timestamp = response.get("data").get("data").get("time")
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-            openInterest = self.unit_conversion_dict.get("bingx_perp_btcusdt_OI")(openInterest, price)
+            timestamp = int(timestamp)
+            openInterest = self.converters["bingx_perp_btcusdt_OI"](openInterest, price)
             return openInterest, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
     
 
 
-    def bingx_trades_lookup(self, response : json) -> list:
+    def bingx_trades_lookup(self, response) -> list:
         """
-            [side, price, amount, timestamp]
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        instrument = response["instrument"]
-        insType = response["insType"]
-        price = response.get("btc_price")
-        if insType == "spot":
-            try:
-                l = []
-                t = response.get("data").get("data")
-                quantity = float(t.get("q"))
-                price = float(t.get("p"))
-                side = "sell" if t.get("m") is True else "buy"
-                timestamp = float(t.get("T"))
-                timestamp = datetime.datetime.fromtimestamp(timestamp / 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                l.append([side, price, quantity, timestamp])
-                return l
-            except:
-                return None
-        if insType == "perpetual":
-            try:
-                l = []
-                for t in response.get("data").get("data"):
-                    quantity = float(t.get("q"))
-                    price = float(t.get("p"))
-                    side = "sell" if t.get("m") is True else "buy"
-                    timestamp = float(t.get("T"))
-                    timestamp = datetime.datetime.fromtimestamp(timestamp / 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                    l.append([side, price, quantity, timestamp])
-                return l
-            except:
-                return None
+        if self.as_arrays:
+            return self.extract_trades("bingx", response)
+        return self.trades_lookups["bingx"](response)
 
     ### BITGET ###
         
-    def bitget_depth_lookup(self, response : json, side : str) -> Tuple[list, str]:
+    @two_sided
+    def bitget_depth_lookup(self, response : json, band : tuple = None) -> depthupdate:
         """
-            side : bids, asks
-            Must return a list of float and timestamp in string format
+            Decodes the response once and returns both sides
             [
                 [float(price), float(amount)],
                 .....
             ]
-            returns: [[price, amount]...], timestamp
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        response = json.loads(response)
+        response = decode_response(response)
         instrument = response["instrument"]
         insType = response["insType"]
         price = response["btc_price"]
-        timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-        if insType == 'perpetual':
-            try:
-                if side == "asks":
-                    books = response.get("data").get("data")[0].get("asks")
-                if side == "bids":
-                    books = response.get("data").get("data")[0].get("bids")
-                books = [list(map(lambda xx : float(xx), x)) for x in books]
-                timestamp = datetime.datetime.fromtimestamp(float(response.get("data").get("data")[0].get("ts")) / 10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
-                return books, timestamp
-            except:
-                try:
-                    if side == "asks":
-                        books = response.get("data").get("response").get("data").get("asks")
-                    if side == "bids":
-                        books = response.get("data").get("response").get("data").get("bids")
-                    books = [list(map(lambda xx : float(xx), x)) for x in books]
-                    timestamp = datetime.datetime.fromtimestamp(response.get("data").get("response").get("requestTime") / 10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
-                    return books, timestamp
-                except:
-                    return None
-        if insType == 'spot':
+        try:
+            books = response.get("data").get("data")[0]
+            snapshot = response.get("data").get("action") == "snapshot"
+            band = None if snapshot else band
+            bids = self.format_books(books.get("bids"), band=band)
+            asks = self.format_books(books.get("asks"), band=band)
+            timestamp = int(float(books.get("ts")))
+            return depthupdate(bids, asks, timestamp, snapshot)
+        except parse_errors:
             try:
-                if side == "asks":
-                    books = response.get("data").get("data")[0].get("asks")
-                if side == "bids":
-                    books = response.get("data").get("data")[0].get("bids")
-                books = [list(map(lambda xx : float(xx), x)) for x in books]
-                timestamp = datetime.datetime.fromtimestamp(float(response.get("data").get("data")[0].get("ts")) / 10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
-                return books, timestamp
-            except:
-                try:
-                    if side == "asks":
-                        books = response.get("data").get("data").get("asks")
-                    if side == "bids":
-                        books = response.get("data").get("data").get("bids")
-                    books = [list(map(lambda xx : float(xx), x)) for x in books]
-                    timestamp = datetime.datetime.fromtimestamp(response.get("data").get("requestTime") / 10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
-                    return books, timestamp
-                except:
-                    return None
+                # API snapshot
+                if insType == 'perpetual':
+                    books = response.get("data").get("response").get("data")
+                    timestamp = response.get("data").get("response").get("requestTime")
+                if insType == 'spot':
+                    books = response.get("data").get("data")
+                    timestamp = response.get("data").get("requestTime")
+                bids = self.format_books(books.get("bids"))
+                asks = self.format_books(books.get("asks"))
+                timestamp = int(timestamp)
+                return depthupdate(bids, asks, timestamp, True)
+            except parse_errors:
+                return None
 
-    def bitget_trades_lookup(self, response : json) -> list:
+    def bitget_trades_lookup(self, response) -> list:
         """
-            [side, price, amount, timestamp]
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        instrument = response["instrument"]
-        insType = response["insType"]
-        price = response.get("btc_price")
-        try:
-            l = []
-            for t in response.get("data").get("data"):
-                quantity = float(t.get("size"))
-                price = float(t.get("price"))
-                side = str(t.get("side"))
-                timestamp = float(t.get("ts"))
-                timestamp = datetime.datetime.fromtimestamp(timestamp / 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                l.append([side, price, quantity, timestamp])
-            return l
-        except:
-            return None
+        if self.as_arrays:
+            return self.extract_trades("bitget", response)
+        return self.trades_lookups["bitget"](response)
     
-    def bitget_OI_funding_lookup(self, response : json) -> Tuple[float, float, str]:
+    def bitget_OI_funding_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             funding, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             funding = float(response.get("data").get("data")[0].get("fundingRate"))
             price = float(response.get("data").get("data")[0].get("lastPr"))
             OI = float(response.get("data").get("data")[0].get("holdingAmount"))
             timestamp = response.get("data").get("ts")
-            timestamp = datetime.datetime.fromtimestamp(timestamp / 10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
             return funding, OI, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
     
     ### DERIBIT ###
 
-    def deribit_depth_lookup(self, response : json, side : str) -> Tuple[list, str]:
+    @two_sided
+    def deribit_depth_lookup(self, response : json, band : tuple = None) -> depthupdate:
         """
-            side : bids, asks
-            Must return a list of float and timestamp in string format
-            [
-                [float(price), float(amount)],
-                .....
-            ]
-            returns: [[price, amount]...], timestamp
+            Decodes the response once and returns both sides
+            Levels come as [action, price, amount]
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        response = json.loads(response)
+        response = decode_response(response)
         instrument = response["instrument"]
         insType = response["insType"]
         price = response["btc_price"]
-        timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
         try:
-            if side == "asks":
-                books = response.get("data").get("params").get("data").get("asks")
-                books = [[x[1], self.unit_conversion_dict.get("deribit_perp_btcusd")(x[1], price)] for x in books]
-            if side == "bids":
-                books = response.get("data").get("params").get("data").get("bids")
-                books = [[x[1], self.unit_conversion_dict.get("deribit_perp_btcusd")(x[1], price)] for x in books]
-            timestamp = response.get("data").get("params").get("data").get("timestamp")
-            timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-            return books, timestamp
-        except:
+            books = response.get("data").get("params").get("data")
+            snapshot = books.get("type") == "snapshot"
+            band = None if snapshot else band
+            convert = self.converters["deribit_perp_btcusd"]
+            bids = self.format_books(books.get("bids"), convert, price, columns=(1, 2), band=band)
+            asks = self.format_books(books.get("asks"), convert, price, columns=(1, 2), band=band)
+            timestamp = books.get("timestamp")
+            timestamp = int(timestamp)
+            return depthupdate(bids, asks, timestamp, snapshot)
+        except parse_errors:
             return None
 
 
-    def deribit_OI_funding_lookup(self, response : json) -> Tuple[float, float, str]:
+    def deribit_OI_funding_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             funding, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             funding = response.get("data").get("params").get("data").get("funding_8h")
             OI = response.get("data").get("params").get("data").get("open_interest")
-            OI = self.unit_conversion_dict.get("deribit_perp_btcusd_OI")(OI, price)
+            OI = self.converters["deribit_perp_btcusd_OI"](OI, price)
             price = response.get("data").get("params").get("data").get("last_price")
             timestamp = response.get("data").get("params").get("data").get("timestamp")
-            timestamp = datetime.datetime.fromtimestamp(timestamp / 10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
             return funding, OI, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
     
-    def deribit_trades_lookup(self, response : json) -> Tuple[float, float, str]:
+    def deribit_trades_lookup(self, response) -> list:
         """
-            funding, price, timestamp
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        price = float(response.get("btc_price"))
-        try:
-            l = []
-            for t in response.get("data").get("params").get("data"):
-                side = t.get("direction")
-                price = t.get("price")
-                quantity = t.get("amount")
-                quantity = self.unit_conversion_dict.get("deribit_perp_btcusd")(float(quantity), price)
-                timestamp = t.get("timestamp")
-                timestamp = datetime.datetime.fromtimestamp(timestamp / 10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
-                l.append([side, price, quantity, timestamp])
-            return l
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-            return None
+        if self.as_arrays:
+            return self.extract_trades("deribit", response)
+        return self.trades_lookups["deribit"](response)
 
 
     ### gateio ### 
         
-    def gateio_depth_lookup(self, response : json, side : str) -> Tuple[list, str]:
+    @two_sided
+    def gateio_depth_lookup(self, response : json, band : tuple = None) -> depthupdate:
         """
-            side : bids, asks
-            Must return a list of float and timestamp in string format
+            Decodes the response once and returns both sides
             [
                 [float(price), float(amount)],
                 .....
             ]
-            returns: [[price, amount]...], timestamp
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        response = json.loads(response)
+        response = decode_response(response)
         instrument = response["instrument"]
         insType = response["insType"]
         price = response["btc_price"]
-        timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
         if insType == "spot":
             try:
-                if side == "asks":
-                    books = response.get("data").get("result").get("a")
-                    books = [[float(x[0]), float(x[1])] for x in books]
-                if side == "bids":
-                    books = response.get("data").get("result").get("b")
-                    books = [[float(x[0]), float(x[1])] for x in books]
-                timestamp = response.get("data").get("result").get("t")
-                timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                return books, timestamp
-            except:
+                books = response.get("data").get("result")
+                bids = self.format_books(books.get("b"), band=band)
+                asks = self.format_books(books.get("a"), band=band)
+                timestamp = books.get("t")
+                timestamp = int(timestamp)
+                return depthupdate(bids, asks, timestamp)
+            except parse_errors:
                 try:
-                    if side == "asks":
-                        books = response.get("data").get("asks")
-                        books = [[float(x[0]), float(x[1])] for x in books]
-                    if side == "bids":
-                        books = response.get("data").get("bids")
-                        books = [[float(x[0]), float(x[1])] for x in books]
-                    timestamp = response.get("data").get("update")
-                    timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                    return books, timestamp
-                except Exception as e:
+                    books = response.get("data")
+                    bids = self.format_books(books.get("bids"))
+                    asks = self.format_books(books.get("asks"))
+                    timestamp = books.get("update")
+                    timestamp = int(timestamp)
+                    # API snapshot
+                    return depthupdate(bids, asks, timestamp, True)
+                except parse_errors as e:
                     # print(f"An error occurred: {e}")
                     return None
 
         if insType == "perpetual":
             try:
-                if side == "asks":
-                    books = response.get("data").get("asks")
-                    books = [[float(x.get("p")), self.unit_conversion_dict.get("gateio_perp_btcusdt")(float(x.get("s")), price)] for x in books]
-                if side == "bids":
-                    books = response.get("data").get("bids")
-                    books = [[float(x.get("p")), self.unit_conversion_dict.get("gateio_perp_btcusdt")(float(x.get("s")), price)] for x in books]
-                timestamp = response.get("data").get("update")
-                timestamp = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-                return books, timestamp
-            except:
+                books = response.get("data")
+                convert = self.converters["gateio_perp_btcusdt"]
+                bids = self.format_books(books.get("bids"), convert, price, columns=("p", "s"))
+                asks = self.format_books(books.get("asks"), convert, price, columns=("p", "s"))
+                timestamp = books.get("update")
+                timestamp = int(float(timestamp) * 1000)
+                # API book
+                return depthupdate(bids, asks, timestamp, True)
+            except parse_errors:
                 return None
         
-    def gateio_funding_lookup(self, response : json) -> Tuple[float, float, str]:
+    def gateio_funding_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             funding, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             funding = float(response.get("data").get("funding_rate"))
             timestamp = float(response.get("timestamp"))
-            timestamp = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(float(timestamp) * 1000)
             return funding, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
         
 
-    def gateio_trades_lookup(self, response : json) -> list:
+    def gateio_trades_lookup(self, response) -> list:
         """
-            [side, price, amount, timestamp]
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        instrument = response["instrument"]
-        insType = response["insType"]
-        price = response.get("btc_price")
-        if insType == "spot":
-            try:
-                l = []
-                t = response.get("data").get("result")
-                quantity = float(t.get("amount"))
-                price = float(t.get("price"))
-                side = t.get("side")
-                timestamp = float(response.get("data").get("time_ms"))
-                timestamp = datetime.datetime.fromtimestamp(timestamp / 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                l.append([side, price, quantity, timestamp])
-                return l
-            except:
-                return None
-        if insType == "perpetual":
-            try:
-                l = []
-                for t in response.get("data"):
-                    quantity = float(t.get("size")) 
-                    quantity = self.unit_conversion_dict.get("gateio_perp_btcusdt")(quantity, price)
-                    price = float(t.get("price"))
-                    side = "sell" if float(t.get("size")) < 0 else "buy"
-                    timestamp = float(t.get("create_time_ms"))
-                    timestamp = datetime.datetime.fromtimestamp(timestamp / 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                    l.append([side, price, quantity, timestamp])
-                return l
-            except:
-                return None
+        if self.as_arrays:
+            return self.extract_trades("gateio", response)
+        return self.trades_lookups["gateio"](response)
 
 
-    def gateio_OI_lookup(self, response : json) -> Tuple[float, float, str]:
+    def gateio_OI_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             OI, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             OI = float(response.get("data")[0].get("open_interest_usd")) 
-            OI = self.unit_conversion_dict.get("gateio_perp_btcusdt")(OI, price)
+            OI = self.converters["gateio_perp_btcusdt"](OI, price)
             timestamp = float(response.get("data")[0].get("time"))
-            timestamp = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(float(timestamp) * 1000)
             return OI, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
     
 
-    def gateio_liquidations_lookup(self, response : json) -> Tuple[float, float, str]:
+    def gateio_liquidations_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             funding, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             l = []
@@ -1035,374 +1244,250 @@ class btc():
                     side = "buy" if float(liquidation.get("size")) > 0 else "sell"
                     price = float(liquidation.get("fill_price"))
                     amount = float(liquidation.get("size"))
-                    amount = self.unit_conversion_dict.get("gateio_perp_btcusdt")(amount, price)
+                    amount = self.converters["gateio_perp_btcusdt"](amount, price)
                     timestamp = liquidation.get("time")
-                    timestamp = datetime.datetime.fromtimestamp(float(timestamp)).strftime('%Y-%m-%d %H:%M:%S')
+                    timestamp = int(float(timestamp) * 1000)
                     l.append([side, price, amount, timestamp])
             return l
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
     
     ## HTX ###
         
-    def htx_depth_lookup(self, response : json, side : str) -> Tuple[list, str]:
+    @two_sided
+    def htx_depth_lookup(self, response : json, band : tuple = None) -> depthupdate:
         """
-            side : bids, asks
-            Must return a list of float and timestamp in string format
+            Decodes the response once and returns both sides
             [
                 [float(price), float(amount)],
                 .....
             ]
-            returns: [[price, amount]...], timestamp
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         insType = response["insType"]
-        if insType == "perpetual":
-            try:
-                if side == "asks":
-                    books = response.get("data").get("tick").get("asks")
-                    books = [[float(x[0]), self.unit_conversion_dict.get("htx_perp_btcusdt")(float(x[1]), price)] for x in books]
-                if side == "bids":
-                    books = response.get("data").get("tick").get("bids")
-                    books = [[float(x[0]), self.unit_conversion_dict.get("htx_perp_btcusdt")(float(x[1]), price)] for x in books]
-                timestamp = response.get("data").get("ts")
-                timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                return books, timestamp
-            except:
-                timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-                return None
-        if insType == "spot":
-            try:
-                if side == "asks":
-                    books = response.get("data").get("tick").get("asks")
-                    books = [[float(x[0]), float(x[1])] for x in books]
-                if side == "bids":
-                    books = response.get("data").get("tick").get("bids")
-                    books = [[float(x[0]), float(x[1])] for x in books]
-                timestamp = response.get("data").get("ts")
-                timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                return books, timestamp
-            except:
-                timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-                return None
+        try:
+            books = response.get("data").get("tick")
+            # The perpetual stream sends a snapshot then updates, every message of the spot stream is the book
+            snapshot = books.get("event", "snapshot") == "snapshot"
+            band = None if snapshot else band
+            if insType == "perpetual":
+                convert = self.converters["htx_perp_btcusdt"]
+                bids = self.format_books(books.get("bids"), convert, price, band=band)
+                asks = self.format_books(books.get("asks"), convert, price, band=band)
+            if insType == "spot":
+                bids = self.format_books(books.get("bids"), band=band)
+                asks = self.format_books(books.get("asks"), band=band)
+            timestamp = response.get("data").get("ts")
+            timestamp = int(timestamp)
+            return depthupdate(bids, asks, timestamp, snapshot)
+        except parse_errors:
+            return None
         
-    def htx_trades_lookup(self, response : json) -> Tuple[float, float, str]:
+    def htx_trades_lookup(self, response) -> list:
         """
-
-            returns funding, price, timestamp
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        price = float(response.get("btc_price"))
-        insType = response["insType"]
-        if insType == "perpetual":
-            try:
-                l = []
-                for trade in response.get("data").get("tick").get("data"):
-                    side = trade.get("direction")
-                    price = float(trade.get("price"))
-                    quantity = abs(trade.get("quantity"))
-                    quantity = self.unit_conversion_dict.get("htx_perp_btcusdt")(quantity, price)
-                    timestamp = trade.get("ts")
-                    timestamp = datetime.datetime.fromtimestamp(timestamp / 10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
-                    l.append([side, price, quantity, timestamp])
-                return l
-            except:
-                timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-                return None
-        if insType == "spot":
-            try:
-                l = []
-                for trade in response.get("data").get("tick").get("data"):
-                    side = trade.get("direction")
-                    price = float(trade.get("price"))
-                    quantity = abs(trade.get("amount"))
-                    timestamp = trade.get("ts")
-                    timestamp = datetime.datetime.fromtimestamp(timestamp / 10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
-                    l.append([side, price, quantity, timestamp])
-                return l
-            except:
-                timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-                return None
+        if self.as_arrays:
+            return self.extract_trades("htx", response)
+        return self.trades_lookups["htx"](response)
         
 
-    def htx_funding_lookup(self, response : json) -> Tuple[float, float, str]:
+    def htx_funding_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             OI, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             funding = float(response.get("data").get("data")[0].get("close"))
             timestamp = float(response.get("data").get("ts"))
-            timestamp = datetime.datetime.fromtimestamp(timestamp / 10 **3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
             return funding, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
-    def htx_OI_lookup(self, response : json) -> Tuple[float, float, str]:
+    def htx_OI_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             OI, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             OI = float(response.get("data").get("data").get("tick")[0].get("value"))
-            OI = self.unit_conversion_dict.get("htx_perp_btcusdt_OI")(OI, price)
+            OI = self.converters["htx_perp_btcusdt_OI"](OI, price)
             timestamp = float(response.get("data").get("ts"))
-            timestamp = datetime.datetime.fromtimestamp(timestamp / 10 **3).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(timestamp)
             return OI, price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+        except parse_errors:
             return None
 
 
     ### Kucoin ###
     
-    def kucoin_OI_funding_lookup(self, response : json) -> Tuple[float, float, str]:
+    def kucoin_OI_funding_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             funding, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             funding = float(response.get("data").get("data").get("fundingFeeRate"))
             price = float(response.get("data").get("data").get("lastTradePrice"))
             OI = float(response.get("data").get("data").get("openInterest"))
             timestamp = response.get("timestamp")
-            timestamp = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-            return funding, self.unit_conversion_dict.get("kucoin_perp_btcusdt")(OI) , price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(float(timestamp) * 1000)
+            return funding, self.converters["kucoin_perp_btcusdt"](OI, price) , price, timestamp
+        except parse_errors:
             return None
     
 
-    def kucoin_depth_lookup(self, response : json, side : str) -> Tuple[list, str]:
+    @two_sided
+    def kucoin_depth_lookup(self, response : json, band : tuple = None) -> depthupdate:
         """
-            side : bids, asks
-            Must return a list of float and timestamp in string format
+            Decodes the response once and returns both sides
             [
                 [float(price), float(amount)],
                 .....
             ]
-            returns: [[price, amount]...], timestamp
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         insType = response["insType"]
         if insType == "spot":
             try:
-                if side == "asks":
-                    books = response.get("data").get("data").get("changes").get("asks")
-                    books = [[float(x[0]), float(x[1])] for x in books]
-                if side == "bids":
-                    books = response.get("data").get("data").get("changes").get("bids")
-                    books = [[float(x[0]), float(x[1])] for x in books]
+                books = response.get("data").get("data").get("changes")
+                bids = self.format_books(books.get("bids"), band=band)
+                asks = self.format_books(books.get("asks"), band=band)
                 timestamp = response.get("data").get("data").get("time")
-                timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                books = [[price, 0]] if len(books) == 0 else books 
-                return books, timestamp
-            except:
+                timestamp = int(timestamp)
+                return depthupdate(bids, asks, timestamp)
+            except parse_errors:
                 try:
-                    if side == "asks":
-                        books = response.get("data").get("data").get("asks")
-                        books = [[float(x[0]), float(x[1])] for x in books]
-                    if side == "bids":
-                        books = response.get("data").get("data").get("bids")
-                        books = [[float(x[0]), float(x[1])] for x in books]
-                    timestamp = response.get("data").get("data").get("time")
-                    timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                    return books, timestamp
-                except:
+                    books = response.get("data").get("data")
+                    bids = self.format_books(books.get("bids"))
+                    asks = self.format_books(books.get("asks"))
+                    timestamp = books.get("time")
+                    timestamp = int(timestamp)
+                    # API snapshot
+                    return depthupdate(bids, asks, timestamp, True)
+                except parse_errors:
                     return None
         if insType == "perpetual":
+                convert = self.converters["kucoin_perp_btcusdt"]
                 try:
-                    books = response.get("data").get("data").get("change")
-                    books = books.split(",")
-                    s = books.pop(1)
-                    s = "asks" if s == "sell" else "bids"
-                    books = list(map(lambda x: float(x), books))
-                    books[1] = self.unit_conversion_dict.get("kucoin_perp_btcusdt")(books[1])
+                    # A single level change "price,side,size", the other side is left empty
+                    change = response.get("data").get("data").get("change").split(",")
+                    level = self.format_books([change], convert, price, columns=(0, 2), band=band)
                     timestamp = response.get("data").get("data").get("timestamp")
-                    timestamp =  datetime.datetime.fromtimestamp(timestamp / 10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
-                    books = [[price, 0]] if len(books) == 0 else [books]
-                    return books, timestamp
-                except:
+                    timestamp =  int(timestamp)
+                    if change[1] == "sell":
+                        return depthupdate(self.format_books([]), level, timestamp)
+                    return depthupdate(level, self.format_books([]), timestamp)
+                except parse_errors:
                     try:
-                        if side == "asks":
-                            books = response.get("data").get("data").get("asks")
-                            books = [[x[0], self.unit_conversion_dict.get("kucoin_perp_btcusdt")(x[1])] for x in books]
-                        if side == "bids":
-                            books = response.get("data").get("data").get("bids")
-                            books = [[x[0], self.unit_conversion_dict.get("kucoin_perp_btcusdt")(x[1])] for x in books]
-                        timestamp = response.get("data").get("data").get("ts")
-                        timestamp =  datetime.datetime.fromtimestamp(timestamp / 10 ** 9).strftime('%Y-%m-%d %H:%M:%S')
-                        return books, timestamp
-                    except:
+                        books = response.get("data").get("response").get("data")
+                        bids = self.format_books(books.get("bids"), convert, price)
+                        asks = self.format_books(books.get("asks"), convert, price)
+                        timestamp = books.get("ts")
+                        timestamp =  int(timestamp) // 10**6
+                        # API snapshot
+                        return depthupdate(bids, asks, timestamp, True)
+                    except parse_errors:
                         return None
             
 
-    def kucoin_trades_lookup(self, response : json) -> Tuple[float, float, str]:
+    def kucoin_trades_lookup(self, response) -> list:
         """
-
-            returns funding, price, timestamp
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        price = float(response.get("btc_price"))
-        insType = response["insType"]
-        if insType == "perpetual":
-            try:
-                l = []
-                trade = response.get("data").get("data")
-                side = trade.get("side")
-                price = float(trade.get("price"))
-                quantity = float(trade.get("size"))
-                quantity = self.unit_conversion_dict.get("kucoin_perp_btcusdt")(quantity)
-                timestamp = response.get("timestamp")
-                timestamp = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-                l.append([side, price, quantity, timestamp])
-                return l
-            except:
-                timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-                return None
-        if insType == "spot":
-            try:
-                l = []
-                trade = response.get("data").get("data")
-                side = trade.get("side")
-                price = float(trade.get("price"))
-                quantity = float(trade.get("size"))
-                timestamp = response.get("timestamp")
-                timestamp = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-                l.append([side, price, quantity, timestamp])
-                return l
-            except:
-                timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-                return None
+        if self.as_arrays:
+            return self.extract_trades("kucoin", response)
+        return self.trades_lookups["kucoin"](response)
             
 
 
 ### MEXC ###
         
-    def mexc_OI_funding_lookup(self, response : json) -> Tuple[float, float, str]:
+    def mexc_OI_funding_lookup(self, response : json) -> Tuple[float, float, int]:
         """
             funding, OI, price, timestamp
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         try:
             funding = float(response.get("data").get("data").get("riseFallRate"))
             price = float(response.get("data").get("data").get("lastPrice"))
             OI = float(response.get("data").get("data").get("holdVol"))
             timestamp = response.get("timestamp")
-            timestamp = datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-            return funding, self.unit_conversion_dict.get("mexc_perp_btcusdt")(OI) , price, timestamp
-        except:
-            timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
+            timestamp = int(float(timestamp) * 1000)
+            return funding, self.converters["mexc_perp_btcusdt"](OI, price) , price, timestamp
+        except parse_errors:
             return None
     
 
 
-    def mexc_depth_lookup(self, response : json, side : str) -> Tuple[list, str]:
+    @two_sided
+    def mexc_depth_lookup(self, response : json, band : tuple = None) -> depthupdate:
         """
-            side : bids, asks
-            Must return a list of float and timestamp in string format
+            Decodes the response once and returns both sides
             [
                 [float(price), float(amount)],
                 .....
             ]
-            returns: [[price, amount]...], timestamp
+            returns: depthupdate([[price, amount]...], [[price, amount]...], timestamp)
         """
-        response = json.loads(response)
+        response = decode_response(response)
         price = float(response.get("btc_price"))
         insType = response["insType"]
         if insType == "spot":
             try:
-                if side == "asks" and "asks" in response.get("data").get("d"):
-                    books = response.get("data").get("d").get("asks")
-                    books = [[float(x.get("p")), float(x.get("v"))] for x in books]
-                if side == "bids" and "bids" in response.get("data").get("d"):
-                    books = response.get("data").get("d").get("bids")
-                    books = [[float(x.get("p")), float(x.get("v"))] for x in books]
+                books = response.get("data").get("d")
+                bids = self.format_books(books.get("bids", []), columns=("p", "v"), band=band)
+                asks = self.format_books(books.get("asks", []), columns=("p", "v"), band=band)
                 timestamp = response.get("data").get("t")
-                timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                return books, timestamp
-            except:
+                timestamp = int(timestamp)
+                return depthupdate(bids, asks, timestamp)
+            except parse_errors:
                 try:
-                    if side == "asks":
-                        books = response.get("data").get("response").get("asks")
-                        books = [[float(x[0]), float(x[1])] for x in books]
-                    if side == "bids":
-                        books = response.get("data").get("response").get("bids")
-                        books = [[float(x[0]), float(x[1])] for x in books]
-                    timestamp = response.get("data").get("response").get("timestamp")
-                    timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                    return books, timestamp
-                except:
+                    # API snapshot
+                    books = response.get("data").get("response")
+                    bids = self.format_books(books.get("bids"))
+                    asks = self.format_books(books.get("asks"))
+                    timestamp = books.get("timestamp")
+                    timestamp = int(timestamp)
+                    return depthupdate(bids, asks, timestamp, True)
+                except parse_errors:
                     return None
         if insType == "perpetual":
             try:
-                if side == "asks":
-                    books = response.get("data").get("data").get("asks")
-                    books = [[float(x[0]), self.unit_conversion_dict.get("mexc_perp_btcusdt")(float(x[1]))] for x in books]
-                if side == "bids":
-                    books = response.get("data").get("data").get("bids")
-                    books = [[float(x[0]), self.unit_conversion_dict.get("mexc_perp_btcusdt")(float(x[1]))] for x in books]
+                books = response.get("data").get("data")
+                convert = self.converters["mexc_perp_btcusdt"]
+                bids = self.format_books(books.get("bids"), convert, price, band=band)
+                asks = self.format_books(books.get("asks"), convert, price, band=band)
                 timestamp = response.get("data").get("ts")
-                timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                return books, timestamp
-            except:
+                timestamp = int(timestamp)
+                return depthupdate(bids, asks, timestamp)
+            except parse_errors:
                 try:
-                    if side == "asks":
-                        books = response.get("data").get("response").get("data").get("asks")
-                        books = [[float(x[0]), float(x[1] * 0.0001)] for x in books]
-                    if side == "bids":
-                        books = response.get("data").get("response").get("data").get("bids")
-                        books = [[float(x[0]), float(x[1] * 0.0001)] for x in books]
-                    timestamp = response.get("data").get("response").get("data").get("timestamp")
-                    timestamp = datetime.datetime.fromtimestamp(timestamp/ 10**3).strftime('%Y-%m-%d %H:%M:%S')
-                    return books, timestamp
-                except:
+                    # API snapshot
+                    books = response.get("data").get("response").get("data")
+                    bids = self.format_books(books.get("bids"), self.converters["mexc_perp_btcusdt"], price)
+                    asks = self.format_books(books.get("asks"), self.converters["mexc_perp_btcusdt"], price)
+                    timestamp = books.get("timestamp")
+                    timestamp = int(timestamp)
+                    return depthupdate(bids, asks, timestamp, True)
+                except parse_errors:
                     return None
 
 
-    def mexc_trades_lookup(self, response : json) -> Tuple[float, float, str]:
+    def mexc_trades_lookup(self, response) -> list:
         """
-
-            returns funding, price, timestamp
+            [[side, price, amount, timestamp]...], see trades_schemas_btc
         """
-        response = json.loads(response)
-        price = float(response.get("btc_price"))
-        insType = response["insType"]
-        if insType == "spot":
-            try:
-                l = []
-                for trade in  response.get("data").get("d").get("deals"):
-                    side = "buy" if trade.get("S") == 1 else "sell"
-                    price = float(trade.get("p"))
-                    quantity = float(trade.get("v")) 
-                    timestamp = response.get("data").get("t")
-                    timestamp = datetime.datetime.fromtimestamp(timestamp /10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
-                    l.append([side, price, quantity, timestamp])
-                return l
-            except:
-                timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-                return None
-        if insType == "perpetual":
-            try:
-                l = []
-                trade = response.get("data").get("data")
-                side = "buy" if trade.get("S") == 1 else "sell"
-                price = float(trade.get("p"))
-                quantity = float(trade.get("v"))
-                quantity = self.unit_conversion_dict.get("mexc_perp_btcusdt")(quantity)
-                timestamp = response.get("data").get("ts")
-                timestamp = datetime.datetime.fromtimestamp(timestamp /10 ** 3).strftime('%Y-%m-%d %H:%M:%S')
-                l.append([side, price, quantity, timestamp])
-                return l
-            except:
-                timestamp = datetime.datetime.fromtimestamp(response["timestamp"]).strftime('%Y-%m-%d %H:%M:%S')
-                return None
\ No newline at end of file
+        if self.as_arrays:
+            return self.extract_trades("mexc", response)
+        return self.trades_lookups["mexc"](response)
\ No newline at end of file
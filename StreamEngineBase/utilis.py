@@ -1,10 +1,181 @@
 import numpy as np
 import datetime
+import calendar
+import functools
+import zlib
 import pandas as pd
 from itertools import chain
+from collections import namedtuple
 
-def booksflow_find_level(price, level_size):
-    return np.ceil(price / level_size) * level_size
+def flow_level_index(price, level_size):
+    """
+        Index of the level of a price, prices in ((index - 1) * level_size, index * level_size] go to level = index * level_size
+    """
+    if isinstance(price, np.ndarray):
+        return np.ceil(price / level_size).astype(np.int64)
+    return int(np.ceil(price / level_size))
+
+def price_ticks(price, tick_size):
+    """
+        price : str, float or array of prices, multiples of tick_size
+        returns: integer tick index, price = ticks * tick_size
+    """
+    if isinstance(price, np.ndarray):
+        return np.rint(price / tick_size).astype(np.int64)
+    return round(float(price) / tick_size)
+
+def number_string(value):
+    """
+        Shortest string of a float as exchanges print it, 12.0 -> "12", 1e-05 -> "0.00001"
+    """
+    text = repr(float(value))
+    if "e" in text:
+        return np.format_float_positional(value, trim="-")
+    return text[:-2] if text.endswith(".0") else text
+
+def crc32_book_checksum(bids, asks, depth=25):
+    """
+        Checksum of the top of the book as okx computes it
+        bids, asks : ["price:amount"...] strings of the levels, best first, see number_string
+        The first depth levels of both sides are interleaved bid, ask, ... and joined by ":"
+        returns: signed 32 bit CRC32 of the string
+    """
+    bids, asks = bids[:depth], asks[:depth]
+    parts = []
+    for i in range(max(len(bids), len(asks))):
+        if i < len(bids):
+            parts.append(bids[i])
+        if i < len(asks):
+            parts.append(asks[i])
+    checksum = zlib.crc32(":".join(parts).encode())
+    return checksum - (1 << 32) if checksum >= 1 << 31 else checksum
+
+def timestamp_bucket(timestamp, bucket_ms, rows):
+    """
+        timestamp : epoch milliseconds, int or array
+        returns: row of the timestamp in a window of rows buckets of bucket_ms milliseconds
+    """
+    if isinstance(timestamp, np.ndarray):
+        return timestamp // bucket_ms % rows
+    return int(timestamp // bucket_ms % rows)
+
+def coarse_level_sums(first, sums, factor):
+    """
+        first, sums : sums of consecutive levels from the level index first on, see flow_level_index
+        factor : levels of a coarse level
+        returns: index of the first coarse level and the block sums, coarse level k holds the levels (k - 1) * factor + 1 to k * factor
+    """
+    offset = (first - 1) % factor
+    blocks = np.zeros(-(-(offset + len(sums)) // factor) * factor, dtype=np.float64)
+    blocks[offset:offset + len(sums)] = sums
+    return (first - 1 - offset) // factor + 1, blocks.reshape(-1, factor).sum(axis=1)
+
+def flow_window_rows(window, bucket_ms):
+    """
+        window : seconds of the window
+        bucket_ms : milliseconds of a row
+        returns: number of rows of the window
+    """
+    rows, rest = divmod(int(window * 1000), bucket_ms)
+    if rows == 0 or rest != 0:
+        raise ValueError(f"window of {window} seconds is not a multiple of {bucket_ms} ms buckets")
+    return rows
+
+def timestamp_format(timestamp, fmt='%Y-%m-%d %H:%M:%S'):
+    """
+        timestamp : epoch milliseconds, formated only at output
+    """
+    return datetime.datetime.fromtimestamp(timestamp / 1000).strftime(fmt)
+
+@functools.lru_cache(maxsize=4096)
+def iso8601_second(prefix):
+    """
+        prefix : YYYY-MM-DDTHH:MM:SS in UTC
+        returns: epoch seconds, cached as consecutive messages share the second
+    """
+    return calendar.timegm((int(prefix[0:4]), int(prefix[5:7]), int(prefix[8:10]), int(prefix[11:13]), int(prefix[14:16]), int(prefix[17:19])))
+
+def iso8601_to_timestamp(text):
+    """
+        Parses ISO-8601/RFC3339 times like 2024-01-30T09:32:20.123456789Z into epoch milliseconds
+        Fraction of any length and Z, +HH:MM, -HH:MM or +HHMM offsets, times without an offset are taken as UTC
+    """
+    if len(text) < 19 or text[4] != "-" or text[10] not in "Tt ":
+        return int(datetime.datetime.fromisoformat(text).timestamp() * 1000)
+    timestamp = iso8601_second(text[:19]) * 1000
+    i = 19
+    if i < len(text) and text[i] == ".":
+        j = i + 1
+        while j < len(text) and text[j].isdigit():
+            j += 1
+        timestamp += int((text[i+1:j] + "00")[:3])
+        i = j
+    offset = text[i:]
+    if offset in ("", "Z", "z"):
+        return timestamp
+    minutes = int(offset[1:3]) * 60 + int(offset[-2:])
+    return timestamp - minutes * 60000 if offset[0] == "+" else timestamp + minutes * 60000
+
+def flow_message_order(timestamp, offsets):
+    """
+        timestamp : timestamp of every row of a batch
+        offsets : rows of the i-th message are [offsets[i], offsets[i+1])
+        returns: order of the rows sorted by timestamp within every message, messages keep their order
+    """
+    messages = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    return np.lexsort((timestamp, messages))
+
+def flow_split_windows(windows):
+    """
+        windows : epoch index of the window of every row
+        returns: slices of consecutive rows of the same window
+    """
+    bounds = [0] + (np.flatnonzero(windows[1:] != windows[:-1]) + 1).tolist() + [len(windows)]
+    return [slice(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+def flow_input_trades(window, seconds, prices, amounts, level_size):
+    """
+        Writes trades of the same minute into the current heatmap of the flow at once
+        The last price of every second and the amounts summed by level
+    """
+    if len(seconds) == 0:
+        return
+    last_seconds, last = np.unique(seconds[::-1], return_index=True)
+    window.fields[last_seconds, 0] = prices[::-1][last]
+    window.add_columns(seconds, flow_level_index(prices, level_size), amounts)
+
+def flow_frame(window, level_size, fill_fields=False, fill_values=False):
+    """
+        window : books.heatmap
+        DataFrame of the window, the fields then the levels in ascending order
+        fill_fields, fill_values : zeros are filled as in fill_zeros, fields never set are NaN
+    """
+    levels, values = window.columns()
+    fields = fill_zeros(window.fields, np.nan) if fill_fields else window.fields
+    if fill_values:
+        values = fill_zeros(values)
+    columns = list(window.names) + [str(float(level * level_size)) for level in levels.tolist()]
+    return pd.DataFrame(np.hstack((fields, values)), index=list(range(len(values))), columns=columns)
+
+def flow_stamp_frame(frame, clock):
+    """
+        clock : books.windowclock of the flow, frame : snapshot of its closed window
+        Marks the snapshot in frame.attrs, window : epoch milliseconds of its start,
+        gap : windows without messages after it, the snapshot is older than the last window when gap > 0
+    """
+    frame.attrs["window"] = clock.closed * clock.window_ms
+    frame.attrs["gap"] = clock.gap
+    return frame
+
+def flow_add_columns(levels, values, other_levels, other_values):
+    """
+        Sums of the columns of two heatmaps over the union of their levels
+    """
+    union = np.union1d(levels, other_levels)
+    sums = np.zeros((len(values), len(union)), dtype=np.float64)
+    sums[:, np.searchsorted(union, levels)] += values
+    sums[:, np.searchsorted(union, other_levels)] += other_values
+    return union, sums
 
 def booksflow_compute_percent_variation(new_value, old_value):
     try:
@@ -13,63 +184,72 @@ def booksflow_compute_percent_variation(new_value, old_value):
     except:
         return 9999999999
 
-def booksflow_manipulate_arrays(old_levels, new_levels, new_values):
+def fill_zeros(values, empty=0.0):
     """
-      helper for dynamically dealing with new columns
+        values : 2d array, rows are seconds
+        Zeros take the last nonzero value of their column, leading zeros the next one, columns of zeros take empty
+        Vectorized replace(0, NA).ffill() and bfill() of a DataFrame
     """
-    new_isolated_levels = np.setdiff1d(new_levels, old_levels)
-    sorted_new_values = np.array([])
-    for i in range(len(old_levels)):
-        index = np.where(new_levels == old_levels[i])[0]
-        if len(index) != 0:
-            sorted_new_values = np.append(sorted_new_values, new_values[index])
-        else:
-            sorted_new_values = np.append(sorted_new_values,0)
-    for i in range(len(new_isolated_levels)):
-        index = np.where(new_levels == new_isolated_levels[i])[0]
-        if len(index) != 0:
-            sorted_new_values = np.append(sorted_new_values, new_values[index])    
-        else:
-            sorted_new_values = np.append(sorted_new_values,0)
-    return sorted_new_values
+    rows = np.arange(values.shape[0])[:, None]
+    columns = np.arange(values.shape[1])
+    nonzero = values != 0
+    last = np.maximum.accumulate(np.where(nonzero, rows, 0), axis=0)
+    values = values[last, columns]
+    nonzero = values != 0
+    following = np.minimum.accumulate(np.where(nonzero, rows, values.shape[0] - 1)[::-1], axis=0)[::-1]
+    values = values[following, columns]
+    if empty != 0:
+        values[:, ~nonzero.any(axis=0)] = empty
+    return values
 
-def booksflow_datatrim(current_price, dataDict, side, book_ceil_thresh):
-    keys_to_remove = []
-    for level in dataDict[side].keys():
-        if abs(booksflow_compute_percent_variation(float(level), current_price)) > book_ceil_thresh:
-            keys_to_remove.append(level)
-    for level in keys_to_remove:
-        del dataDict[side][level]
+optioninstrument = namedtuple("optioninstrument", ["strike", "expiry", "side"])
+
+# position of the expiry in the symbol and its format
+option_expiry_formats = {
+    "deribit" : (1, "%d%b%y"),      # BTC-29MAR24-60000-C
+    "bybit" : (1, "%d%b%y"),        # BTC-29MAR24-60000-C
+    "okx" : (2, "%y%m%d"),          # BTC-USD-240329-60000-C
+}
+
+@functools.lru_cache(maxsize=1024)
+def option_expiry(date : str, fmt : str):
+    return datetime.datetime.strptime(date, fmt)
+
+@functools.lru_cache(maxsize=65536)
+def option_instrument(symbol : str, exchange : str):
+    """
+        Parses the symbol once
+        returns: optioninstrument(strike, expiry, side)   float, datetime, C or P
+    """
+    parts = symbol.split("-")
+    position, fmt = option_expiry_formats[exchange]
+    return optioninstrument(float(parts[-2]), option_expiry(parts[position], fmt), parts[-1])
+
+def option_countdown(expiry, exchange : str, now):
+    """
+        days left to expiry, bybit counts full days from now, deribit and okx count calendar days
+    """
+    if exchange == "bybit":
+        return int((expiry - now).days)
+    return float((expiry.date() - now.date()).days)
+
+def option_countdowns(expiries : list, exchange : str, now=None):
+    """
+        expiries : expiry of every row
+        Countdowns are computed once per expiry for the evaluation time now
+    """
+    now = datetime.datetime.now() if now is None else now
+    countdowns = {expiry : option_countdown(expiry, exchange, now) for expiry in set(expiries)}
+    return np.array([countdowns[expiry] for expiry in expiries])
 
 def calculate_option_time_to_expire_deribit(date : str):                                  
-    today_day = datetime.datetime.now().timetuple().tm_yday
-    today_year = datetime.datetime.now().year
-    f = datetime.datetime.strptime(date, "%d%b%y")
-    expiration_date = f.timetuple().tm_yday
-    expiration_year = f.year
-    if today_year == expiration_year:
-        r = expiration_date - today_day
-    if today_year == expiration_year + 1:
-        r = 365 + expiration_date - today_day
-    return float(r)
+    return option_countdown(option_expiry(date, "%d%b%y"), "deribit", datetime.datetime.now())
 
 def calculate_option_time_to_expire_okex(date):                                  
-    today_day = datetime.datetime.now().timetuple().tm_yday
-    today_year = datetime.datetime.now().year
-    f = datetime.datetime.strptime(date, "%y%m%d")
-    expiration_date = f.timetuple().tm_yday
-    expiration_year = f.year
-    if today_year == expiration_year:
-        r = expiration_date - today_day
-    if today_year == expiration_year + 1:
-        r = 365 + expiration_date - today_day
-    return float(r)
+    return option_countdown(option_expiry(date, "%y%m%d"), "okx", datetime.datetime.now())
 
 def calculate_option_time_to_expire_bybit(date):
-    target_date = datetime.datetime.strptime(date, '%d%b%y')
-    current_date = datetime.datetime.now()
-    days_left = (target_date - current_date).days
-    return int(days_left)
+    return option_countdown(option_expiry(date, "%d%b%y"), "bybit", datetime.datetime.now())
 
 
 def merge_suffixes(n):
@@ -0,0 +1,82 @@
+"""
+    Coinbase replay benchmark of the ISO-8601 parser of the lookups against dateutil
+    Replays examples/data coinbase depth and trades through the lookups with both parsers
+    The trades extractors bind the parser when they are compiled, so the lookups are built again for each parser
+        python examples/bench_coinbase.py [repeat]
+"""
+import os
+import sys
+import json
+import time
+
+from dateutil import parser
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), "StreamEngineBase"))
+import lookups
+import extractors
+import utilis
+
+data_dir = os.path.join(current_dir, "data")
+
+
+def dateutil_to_timestamp(text):
+    return int(parser.parse(text).timestamp() * 1000)
+
+
+def load_messages(file : str) -> list:
+    with open(os.path.join(data_dir, file)) as f:
+        return [json.dumps(message).encode() for message in json.load(f)]
+
+
+def build_lookups(parse : callable):
+    """
+        lookups.btc with parse as the ISO-8601 parser of the depth lookup and of the compiled trades extractors
+    """
+    lookups.iso8601_to_timestamp = parse
+    extractors.iso8601_to_timestamp = parse
+    try:
+        return lookups.btc(lookups.unit_conversion_btc)
+    finally:
+        extractors.iso8601_to_timestamp = utilis.iso8601_to_timestamp
+
+
+def replay(lookup : callable, messages : list, repeat : int) -> tuple:
+    """
+        returns: seconds per pass, outputs
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        utilis.iso8601_second.cache_clear()
+        start = time.perf_counter()
+        outputs = [lookup(message) for message in messages]
+        best = min(best, time.perf_counter() - start)
+    return best, outputs
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    cases = {
+        "depth" : ("coinbase_depth_lookup", load_messages("coinbase_spot_btcusd_depth.json")),
+        "trades" : ("coinbase_trades_lookup", load_messages("coinbase_spot_btcusd_trades.json")),
+    }
+    parsers = {"dateutil" : dateutil_to_timestamp, "iso8601" : utilis.iso8601_to_timestamp}
+    print(f"{'stream':<10}{'messages':>10}" + "".join(f"{p + ' ms':>14}" for p in parsers) + f"{'speedup':>10}")
+    for stream, (name, messages) in cases.items():
+        timings = {}
+        outputs = {}
+        for parser_name, parse in parsers.items():
+            lookup = getattr(build_lookups(parse), name)
+            timings[parser_name], outputs[parser_name] = replay(lookup, messages, repeat)
+        lookups.iso8601_to_timestamp = utilis.iso8601_to_timestamp
+        assert outputs["dateutil"] == outputs["iso8601"]
+        print(f"{stream:<10}{len(messages):>10}" + "".join(f"{timings[p] * 1000:>14.2f}" for p in parsers) + f"{timings['dateutil'] / timings['iso8601']:>10.2f}")
+
+    events = [event for m in cases["trades"][1] for event in json.loads(m)["data"].get("events", [])]
+    times = [trade["time"] for event in events for trade in event.get("trades", [])]
+    for name, parse in parsers.items():
+        utilis.iso8601_second.cache_clear()
+        start = time.perf_counter()
+        for t in times:
+            parse(t)
+        print(f"{name:<10}{len(times):>10} times {(time.perf_counter() - start) / len(times) * 10**6:>8.2f} us per call")
@@ -0,0 +1,66 @@
+"""
+    Micro-benchmark of the json decoder backends of the lookups module over examples/data
+    Messages are fed as bytes, as they come from the websockets
+        python examples/bench_decoders.py [repeat]
+"""
+import os
+import sys
+import json
+import time
+from collections import defaultdict
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), "StreamEngineBase"))
+import lookups
+
+data_dir = os.path.join(current_dir, "data")
+
+
+def load_messages() -> dict:
+    """
+        returns: {exchange : [bytes...]}
+    """
+    messages = defaultdict(list)
+    for file in sorted(os.listdir(data_dir)):
+        if not file.endswith(".json"):
+            continue
+        exchange = file[:-len(".json")].split("_")[0]
+        with open(os.path.join(data_dir, file)) as f:
+            for message in json.load(f):
+                messages[exchange].append(json.dumps(message).encode())
+    return messages
+
+
+def bench(decoder : callable, messages : list, repeat : int) -> float:
+    """
+        returns: seconds per pass
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for message in messages:
+            decoder(message)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    messages = load_messages()
+    backends = list(lookups.json_decoders)
+    print(f"selected backend: {lookups.json_backend}")
+    # Speedup of every backend over the stdlib, below 1 where the backend is slower
+    faster = [b for b in backends if b != "json"]
+    print(f"{'exchange':<10}{'messages':>10}{'MB':>8}" + "".join(f"{b + ' ms':>12}" for b in backends)
+          + "".join(f"{b + ' x':>12}" for b in faster) + f"{'differ':>8}")
+    totals = defaultdict(float)
+    for exchange, ms in messages.items():
+        # Messages decoded differently than the stdlib, e.g. integers above 64 bits come as floats with orjson
+        differ = sum(any(lookups.json_decoders[b](m) != json.loads(m) for b in backends) for m in ms)
+        timings = {b : bench(lookups.json_decoders[b], ms, repeat) for b in backends}
+        for b, t in timings.items():
+            totals[b] += t
+        size = sum(len(m) for m in ms) / 10**6
+        print(f"{exchange:<10}{len(ms):>10}{size:>8.2f}" + "".join(f"{timings[b] * 1000:>12.2f}" for b in backends)
+              + "".join(f"{timings['json'] / timings[b]:>12.2f}" for b in faster) + f"{differ:>8}")
+    print(f"{'total':<28}" + "".join(f"{totals[b] * 1000:>12.2f}" for b in backends) + "".join(f"{totals['json'] / totals[b]:>12.2f}" for b in faster))
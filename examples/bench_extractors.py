@@ -0,0 +1,192 @@
+"""
+    Replay benchmark of the trades lookups over examples/data
+    Compares the compiled lookups of this tree against the hand-written lookups below, the per-exchange code they replaced,
+    and counts the messages for which they return different trades
+    Only the data messages are replayed, flows skip the others before any lookup (lookups.parse_message)
+        python examples/bench_extractors.py [repeat] [baseline StreamEngineBase directory]
+    With a directory, the lookups of its lookups.py are the baseline instead, e.g. an older checkout
+    Older lookups decode with json.loads, so both sides then replay the raw json strings and the timings include decoding
+"""
+import os
+import sys
+import json
+import time
+import importlib.util
+from collections import defaultdict
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), "StreamEngineBase"))
+import lookups
+
+data_dir = os.path.join(current_dir, "data")
+
+
+class handwritten(lookups.btc):
+    """
+        Trades lookups written out per exchange, as they were before trades_schemas_btc
+        mexc perpetual reads the side from T like the schema does
+    """
+
+    def binance_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            trade = response["data"]
+            side = "buy" if trade["m"] == True else "sell"
+            convert = None
+            if response["insType"] == "perpetual" and response["instrument"] == "btcusd":
+                convert = self.converters["binance_perp_btcusd"]
+            return self.format_trades([[side, float(trade["p"]), float(trade["q"]), int(trade["E"])]], convert)
+        except:
+            return None
+
+    def bybit_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            return self.format_trades([[t["S"].lower(), float(t["p"]), float(t["v"]), int(t["T"])] for t in response["data"]["data"]])
+        except:
+            return None
+
+    def coinbase_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            trades = response["data"]["events"][0]["trades"]
+            return self.format_trades([[t["side"].lower(), float(t["price"]), float(t["size"]), lookups.iso8601_to_timestamp(t["time"])] for t in trades])
+        except:
+            return None
+
+    def okx_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            convert = None
+            if response["insType"] == "perpetual" and response["instrument"] == "btcusd":
+                convert = self.converters["okx_perp_btcusd"]
+            return self.format_trades([[t["side"], float(t["px"]), float(t["sz"]), int(t["ts"])] for t in response["data"]["data"]], convert)
+        except:
+            return None
+
+    def bingx_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            trades = response["data"]["data"]
+            if response["insType"] == "spot":
+                trades = [trades]
+            return self.format_trades([["sell" if t["m"] is True else "buy", float(t["p"]), float(t["q"]), int(float(t["T"]))] for t in trades])
+        except:
+            return None
+
+    def bitget_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            return self.format_trades([[str(t["side"]), float(t["price"]), float(t["size"]), int(float(t["ts"]))] for t in response["data"]["data"]])
+        except:
+            return None
+
+    def deribit_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            trades = response["data"]["params"]["data"]
+            return self.format_trades([[t["direction"], float(t["price"]), float(t["amount"]), int(t["timestamp"])] for t in trades],
+                                      self.converters["deribit_perp_btcusd"])
+        except:
+            return None
+
+    def gateio_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            if response["insType"] == "spot":
+                t = response["data"]["result"]
+                return self.format_trades([[t["side"], float(t["price"]), float(t["amount"]), int(float(response["data"]["time_ms"]))]])
+            return self.format_trades([["sell" if float(t["size"]) < 0 else "buy", float(t["price"]), float(t["size"]), int(float(t["create_time_ms"]))]
+                                       for t in response["data"]], self.converters["gateio_perp_btcusdt"])
+        except:
+            return None
+
+    def htx_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            trades = response["data"]["tick"]["data"]
+            if response["insType"] == "spot":
+                return self.format_trades([[t["direction"], float(t["price"]), abs(t["amount"]), int(t["ts"])] for t in trades])
+            return self.format_trades([[t["direction"], float(t["price"]), abs(t["quantity"]), int(t["ts"])] for t in trades],
+                                      self.converters["htx_perp_btcusdt"])
+        except:
+            return None
+
+    def kucoin_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            t = response["data"]["data"]
+            convert = self.converters["kucoin_perp_btcusdt"] if response["insType"] == "perpetual" else None
+            return self.format_trades([[t["side"], float(t["price"]), float(t["size"]), int(float(response["timestamp"]) * 1000)]], convert)
+        except:
+            return None
+
+    def mexc_trades_lookup(self, response) -> list:
+        response = lookups.decode_response(response)
+        try:
+            if response["insType"] == "spot":
+                timestamp = int(response["data"]["t"])
+                return self.format_trades([["buy" if t["S"] == 1 else "sell", float(t["p"]), float(t["v"]), timestamp] for t in response["data"]["d"]["deals"]])
+            t = response["data"]["data"]
+            return self.format_trades([["buy" if t["T"] == 1 else "sell", float(t["p"]), float(t["v"]), int(response["data"]["ts"])]],
+                                      self.converters["mexc_perp_btcusdt"])
+        except:
+            return None
+
+
+def load_lookups(directory : str):
+    """
+        lookups module of another StreamEngineBase directory, it shares the modules it imports with this tree
+    """
+    spec = importlib.util.spec_from_file_location("lookups_baseline", os.path.join(directory, "lookups.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_messages(raw : bool = False) -> dict:
+    """
+        raw : json strings instead of decoded messages
+        returns: {exchange : [message...]} of the trades files
+    """
+    messages = defaultdict(list)
+    for file in sorted(os.listdir(data_dir)):
+        if file.endswith("_trades.json"):
+            with open(os.path.join(data_dir, file)) as f:
+                decoded = [message for message in json.load(f) if lookups.classify_message(message) == "data"]
+            messages[file.split("_")[0]].extend(json.dumps(message) for message in decoded) if raw else messages[file.split("_")[0]].extend(decoded)
+    return messages
+
+
+def replay(lookup : callable, messages : list, repeat : int) -> tuple:
+    """
+        returns: seconds per pass, outputs
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        outputs = [lookup(message) for message in messages]
+        best = min(best, time.perf_counter() - start)
+    return best, outputs
+
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    directory = sys.argv[2] if len(sys.argv) > 2 else None
+    instances = {"compiled" : lookups.btc(lookups.unit_conversion_btc)}
+    if directory is None:
+        instances["baseline"] = handwritten(lookups.unit_conversion_btc)
+    else:
+        baseline = load_lookups(directory)
+        instances["baseline"] = baseline.btc(baseline.unit_conversion_btc)
+    print(f"{'exchange':<10}{'messages':>10}" + "".join(f"{name + ' us':>14}" for name in instances) + f"{'speedup':>10}{'differ':>8}")
+    totals = defaultdict(float)
+    for exchange, messages in load_messages(raw=directory is not None).items():
+        timings, outputs = {}, {}
+        for name, instance in instances.items():
+            timings[name], outputs[name] = replay(getattr(instance, f"{exchange}_trades_lookup"), messages, repeat)
+            totals[name] += timings[name]
+        differ = sum(a != b for a, b in zip(outputs["compiled"], outputs["baseline"]))
+        print(f"{exchange:<10}{len(messages):>10}" + "".join(f"{timings[name] / len(messages) * 10**6:>14.2f}" for name in instances)
+              + f"{timings['baseline'] / timings['compiled']:>10.2f}{differ:>8}")
+    print(f"{'total ms':<20}" + "".join(f"{totals[name] * 1000:>14.2f}" for name in instances) + f"{totals['baseline'] / totals['compiled']:>10.2f}")
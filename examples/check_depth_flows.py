@@ -0,0 +1,78 @@
+"""
+    Replays every depth file of examples/data through booksflow.update_books, booksflow.update_books_batch
+    and coalescedbooksflow, with list and array lookups, and compares their books and heatmaps
+    Exits with an error if any of them differ from the messages applied one by one
+        python examples/check_depth_flows.py [batch size]
+"""
+import os
+import sys
+import json
+import warnings
+
+import numpy as np
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), "StreamEngineBase"))
+import flow
+import lookups
+
+data_dir = os.path.join(current_dir, "data")
+level_size = 20
+coarse_levels = (100,)
+
+
+def frames(books) -> list:
+    """
+        returns: the frames of the current and the last closed window, at level_size and at the coarse levels
+    """
+    return [books.df, books.snapshot] + [frame for size in coarse_levels for frame in (books.df_at(size), books.snapshot_at(size))]
+
+
+def same_frame(a, b) -> bool:
+    if a is None or b is None:
+        return a is None and b is None
+    if a.shape != b.shape or list(a.columns) != list(b.columns):
+        return False
+    return np.allclose(a.values.astype(np.float64), b.values.astype(np.float64), rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def same_books(a, b) -> bool:
+    """
+        frames are read first, coalescedbooksflow flushes its last second when they are
+    """
+    same = all(same_frame(x, y) for x, y in zip(frames(a), frames(b)))
+    return same and all(sorted(a.B[side].items()) == sorted(b.B[side].items()) for side in ("bids", "asks"))
+
+
+def replay(instance, file : str, size : int) -> dict:
+    """
+        returns: {path : whether its books and heatmaps match the messages applied one by one}
+    """
+    lookup = getattr(instance, file.split("_")[0] + "_depth_lookup")
+    with open(os.path.join(data_dir, file)) as f:
+        messages = json.load(f)
+    books = {name : cls(file, "btcusdt", "perpetual", level_size, lookup, coarse_levels=coarse_levels)
+             for name, cls in (("single", flow.booksflow), ("batch", flow.booksflow), ("coalesced", flow.coalescedbooksflow))}
+    for message in messages:
+        books["single"].update_books(message)
+        books["coalesced"].update_books(message)
+    for start in range(0, len(messages), size):
+        books["batch"].update_books_batch(messages[start:start+size])
+    return {name : same_books(books["single"], books[name]) for name in ("batch", "coalesced")}
+
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 25
+    instances = {"lists" : lookups.btc(lookups.unit_conversion_btc), "arrays" : lookups.btc(lookups.unit_conversion_btc, as_arrays=True)}
+    failed = []
+    print(f"{'file':<36}{'mode':>8}{'batch':>8}{'coalesced':>11}")
+    for file in sorted(os.listdir(data_dir)):
+        if not file.endswith("_depth.json"):
+            continue
+        for mode, instance in instances.items():
+            matches = replay(instance, file, size)
+            print(f"{file:<36}{mode:>8}{str(matches['batch']):>8}{str(matches['coalesced']):>11}")
+            failed.extend(f"{file} ({mode}, {name})" for name, match in matches.items() if not match)
+    if len(failed) != 0:
+        sys.exit("books differ from update_books in " + ", ".join(failed))
@@ -0,0 +1,43 @@
+"""
+    Replays every depth file of examples/data through its depth lookup, with list and array output,
+    and counts the messages that parse and the snapshots among them
+    Exits with an error if a file has no message that parses
+        python examples/check_depth_lookups.py
+"""
+import os
+import sys
+import json
+import functools
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(os.path.dirname(current_dir), "StreamEngineBase"))
+import lookups
+
+data_dir = os.path.join(current_dir, "data")
+
+
+def check(instance, file : str) -> tuple:
+    """
+        returns: messages, parsed messages, snapshots
+    """
+    lookup = functools.partial(lookups.lookup_books, getattr(instance, file.split("_")[0] + "_depth_lookup"))
+    with open(os.path.join(data_dir, file)) as f:
+        messages = json.load(f)
+    parsed = [books for books in (lookups.parse_message(lookup, message) for message in messages) if books is not None]
+    return len(messages), len(parsed), sum(books.snapshot for books in parsed)
+
+
+if __name__ == "__main__":
+    instances = {"lists" : lookups.btc(lookups.unit_conversion_btc), "arrays" : lookups.btc(lookups.unit_conversion_btc, as_arrays=True)}
+    failed = []
+    print(f"{'file':<36}{'mode':>8}{'messages':>10}{'parsed':>8}{'snapshots':>11}")
+    for file in sorted(os.listdir(data_dir)):
+        if not file.endswith("_depth.json"):
+            continue
+        for mode, instance in instances.items():
+            count, parsed, snapshots = check(instance, file)
+            print(f"{file:<36}{mode:>8}{count:>10}{parsed:>8}{snapshots:>11}")
+            if parsed == 0:
+                failed.append(f"{file} ({mode})")
+    if len(failed) != 0:
+        sys.exit("no message parses in " + ", ".join(failed))